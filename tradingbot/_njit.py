@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Opsiyonel numba sarmalayıcısı.
+numba kuruluysa gerçek `njit` kullanılır, değilse fonksiyonlar saf Python olarak çalışır.
+"""
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba opsiyonel bağımlılık
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """numba yoksa dekoratörü etkisiz hale getir (@njit ve @njit(...) desteklenir)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+__all__ = ["njit", "HAS_NUMBA"]
@@ -60,6 +60,7 @@ SMC_CONFIRMATION_STRENGTH = 0.45  # Daha gevşek onay mumu
 SMC_OTE_RETEST_MIN = 0.3  # 30% minimum retest (gevşek)
 SMC_OTE_RETEST_MAX = 0.85  # 85% maximum retest (çok gevşek)
 SMC_VOLUME_FACTOR = 1.05  # Minimal volume gerekli
+SMC_FLOAT32_SCANS = False  # Swing/sweep/retest taramalarını float32 dizilerle yap (eşik kenarında sonuç değişebilir)
 
 ATR_PERIOD = 14
 SWING_WIN = 10
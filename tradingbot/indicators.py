@@ -67,6 +67,26 @@ def body_strength(o, c, h, l):
     
     return pd.Series(np.nan_to_num(val, nan=0.0), index=c.index)
 
+def body_strength_last(o, c, h, l) -> float:
+    """
+    Sadece son mumun gövde/menzil oranını hesapla (body_strength(...).iloc[-1] ile aynı).
+    
+    Args:
+        o: Açılış serisi veya dizisi
+        c: Kapanış serisi veya dizisi
+        h: Yüksek serisi veya dizisi
+        l: Düşük serisi veya dizisi
+        
+    Returns:
+        float: Son mumun body strength değeri (0-1 arası)
+    """
+    o_last = float(np.asarray(o)[-1])
+    c_last = float(np.asarray(c)[-1])
+    rng = abs(float(np.asarray(h)[-1]) - float(np.asarray(l)[-1]))
+    
+    val = abs(c_last - o_last) / rng if rng > 0 else 0.0
+    return 0.0 if np.isnan(val) else val
+
 def atr_wilder(h, l, c, n: int = 14):
     """
     Wilder's Average True Range hesapla.
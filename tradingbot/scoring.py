@@ -12,7 +12,7 @@ from typing import Dict, Any, Tuple, Optional, List
 from . import config
 from .utils import log, sigmoid
 from .indicators import (
-    atr_wilder, bollinger, adx, ema, body_strength, htf_gate_and_bias
+    atr_wilder, bollinger, adx, ema, body_strength, body_strength_last, htf_gate_and_bias
 )
 
 # Geçmiş sembol penaltileri
@@ -81,7 +81,10 @@ def bw_advantage(bw: float) -> float:
     """
     if math.isnan(bw):
         return 0.0
-    return max(0.0, 1.0 - (bw / max(1e-6, config.BWIDTH_RANGE)))
+    # BWIDTH_RANGE mod değişiminde güncellendiği için modül seviyesinde sabitlenmez
+    bwr = config.BWIDTH_RANGE
+    adv = 1.0 - (bw / (bwr if bwr > 1e-6 else 1e-6))
+    return adv if adv > 0.0 else 0.0
 
 def atr_in_sweet(atr_pct: float) -> float:
     """
@@ -130,7 +133,13 @@ def extract_features_for_scoring(symbol: str, df15: pd.DataFrame, df1h: pd.DataF
     tp1 = float(candidate["tps"][0])
     sl = float(candidate["sl"])
     
-    rr1 = (tp1 - entry) / max(1e-9, entry - sl) if candidate["side"] == "LONG" else (entry - tp1) / max(1e-9, sl - entry)
+    # Payda koruması satır içi koşulla (max() çağrısı yok)
+    if candidate["side"] == "LONG":
+        den = entry - sl
+        rr1 = (tp1 - entry) / (den if den > 1e-9 else 1e-9)
+    else:
+        den = sl - entry
+        rr1 = (entry - tp1) / (den if den > 1e-9 else 1e-9)
     
     _, _, _, bwidth, _ = bollinger(c, config.BB_PERIOD, config.BB_K)
     bw_last = float(bwidth.iloc[-1]) if pd.notna(bwidth.iloc[-1]) else float("nan")
@@ -140,7 +149,13 @@ def extract_features_for_scoring(symbol: str, df15: pd.DataFrame, df1h: pd.DataF
     
     # Momentum LTF doğrulaması
     from .strategies.trend_range import TrendRangeStrategy
-    ltf_is_ok = TrendRangeStrategy(symbol).momentum_ok(df15, candidate["side"])
+    c_a = c.to_numpy()
+    ltf_is_ok = TrendRangeStrategy.momentum_ok(
+        float(ema(c, 9).to_numpy()[-1]), float(ema(c, 21).to_numpy()[-1]),
+        close, float(c_a[-2]),
+        body_strength_last(o.to_numpy(), c_a, h.to_numpy(), l.to_numpy()),
+        candidate["side"]
+    )
     
     has_retest_or_fvg = ("Retest" in candidate.get("reason", "")) or (candidate.get("regime") == "SMC")
     
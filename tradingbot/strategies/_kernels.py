@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Stratejilerin sıcak yollarında kullanılan sayısal çekirdekler.
+Girdi olarak sadece numpy dizileri ve skaler değerler alır (numba ile derlenebilir).
+"""
+
+import numpy as np
+
+from .._njit import njit
+
+# MOMO_CONFIRM_MODE -> çekirdek mod kodu
+MOMO_MODE_OFF = 0
+MOMO_MODE_STRICT3 = 1
+MOMO_MODE_2OF3 = 2
+MOMO_MODE_NET_BODY = 3
+MOMO_MODE_DEFAULT = 4
+
+MOMO_MODE_IDS = {
+    "off": MOMO_MODE_OFF,
+    "strict3": MOMO_MODE_STRICT3,
+    "2of3": MOMO_MODE_2OF3,
+    "net_body": MOMO_MODE_NET_BODY,
+}
+
+@njit(cache=True)
+def _ewm_last(x, alpha):
+    """
+    pandas `ewm(alpha=alpha, adjust=False).mean()` serisinin son değeri.
+    NaN işleme (ignore_na=False) ve bölme sırası pandas ile birebir aynıdır.
+    """
+    old_wt_factor = 1.0 - alpha
+    weighted = np.nan
+    old_wt = 1.0
+    for i in range(x.shape[0]):
+        cur = x[i]
+        is_obs = cur == cur
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_obs:
+            weighted = cur
+    return weighted
+
+@njit(cache=True)
+def _true_range(h, l, c):
+    """indicators.atr_wilder içindeki true range dizisi (ilk eleman NaN)."""
+    n = h.shape[0]
+    tr = np.empty(n, dtype=np.float64)
+    if n > 0:
+        tr[0] = np.nan
+    for i in range(1, n):
+        pc = c[i - 1]
+        tr1 = abs(h[i] - l[i])
+        tr2 = abs(h[i] - pc)
+        tr3 = abs(l[i] - pc)
+        # np.maximum gibi NaN'ı yay
+        if tr1 != tr1 or tr2 != tr2 or tr3 != tr3:
+            tr[i] = np.nan
+        else:
+            tr[i] = max(tr1, tr2, tr3)
+    return tr
+
+@njit(cache=True)
+def _prev_rolling_extreme(x, win, use_max):
+    """
+    `x.rolling(win).max()/min().shift(1).iloc[-1]` değeri.
+    Pencerede NaN varsa veya yeterli veri yoksa NaN döner.
+    """
+    end = x.shape[0] - 1
+    start = end - win
+    if start < 0:
+        return np.nan
+    ext = x[start]
+    for i in range(start, end):
+        val = x[i]
+        if val != val:
+            return np.nan
+        if use_max:
+            if val > ext:
+                ext = val
+        elif val < ext:
+            ext = val
+    return ext
+
+@njit(cache=True)
+def momentum_check(o3, c3, h3, l3, v20, body_min, rel_vol, net_th, mode_id, side_sign):
+    """
+    Momentum onay çekirdeği.
+    
+    Args:
+        o3, c3, h3, l3: Son 3 mumun açılış/kapanış/yüksek/düşük değerleri
+        v20: Son 20 mumun hacmi
+        body_min: Son mum için minimum gövde/menzil oranı
+        rel_vol: 20 mumluk hacim ortalamasına göre relatif hacim eşiği
+        net_th: Net gövde eşiği
+        mode_id: MOMO_MODE_* kodu
+        side_sign: LONG için 1.0, SHORT için -1.0
+        
+    Returns:
+        bool: Momentum onayı varsa True
+    """
+    if mode_id == MOMO_MODE_OFF:
+        return True
+    
+    # Body strength kontrolü (son mum)
+    rng = abs(h3[-1] - l3[-1])
+    bs = abs(c3[-1] - o3[-1]) / rng if rng > 0.0 else 0.0
+    body_ok = bs >= body_min
+    
+    # Hacim kontrolü (20 mumdan azsa ortalama tanımsız)
+    vol_ok = False
+    if v20.shape[0] >= 20:
+        vol_ok = v20[-1] > v20.mean() * rel_vol
+    
+    # Net gövde kontrolü (son 3 mumun yön yönündeki gövde toplamı)
+    net_body = 0.0
+    total_range = 0.0
+    for i in range(o3.shape[0]):
+        d = side_sign * (c3[i] - o3[i])
+        if d > 0.0:
+            net_body += d
+        total_range += h3[i] - l3[i]
+    net_ok = (net_body / (total_range if total_range > 1e-9 else 1e-9)) >= net_th
+    
+    if mode_id == MOMO_MODE_STRICT3:
+        return body_ok and vol_ok and net_ok
+    elif mode_id == MOMO_MODE_2OF3:
+        return (int(body_ok) + int(vol_ok) + int(net_ok)) >= 2
+    elif mode_id == MOMO_MODE_NET_BODY:
+        return net_ok
+    else:
+        return body_ok or vol_ok
+
+@njit(cache=True)
+def momentum_decision(o, h, l, c, v, atrv, e9, e21, dc_win, prebreak_x, side_sign,
+                      body_min, rel_vol, net_th, mode_id):
+    """
+    MomentumStrategy'nin gösterge sonrası 15M karar mantığı (Donchian yakınlığı,
+    EMA9/21 momentumu ve momentum onayı). numba yoksa saf Python olarak çalışır.
+    
+    Args:
+        o, h, l, c, v: 15M OHLCV dizileri
+        atrv: Son ATR değeri
+        e9, e21: Kapanış EMA9/EMA21 son değerleri
+        dc_win: Donchian penceresi
+        prebreak_x: Erken tetikleme mesafesi (ATR çarpanı)
+        side_sign: LONG için 1.0, SHORT için -1.0
+        body_min, rel_vol, net_th, mode_id: momentum_check parametreleri
+        
+    Returns:
+        Tuple: (onay, kırılım seviyesine kalan mesafe)
+    """
+    close = c[-1]
+    prebreak_dist = prebreak_x * atrv
+    
+    if side_sign > 0:
+        level = _prev_rolling_extreme(h, dc_win, True)
+        near_dc_break = close >= (level - prebreak_dist)
+        ema_momentum = (e9 > e21) and (close > e9)
+        # Kırılım seviyesine kalan mesafe (> 0 ise kırılım henüz olmadı → erken)
+        break_gap = level - close
+    else:
+        level = _prev_rolling_extreme(l, dc_win, False)
+        near_dc_break = close <= (level + prebreak_dist)
+        ema_momentum = (e9 < e21) and (close < e9)
+        break_gap = close - level
+    
+    confirmed = near_dc_break and ema_momentum and momentum_check(
+        o[-3:], c[-3:], h[-3:], l[-3:], v[-20:], body_min, rel_vol, net_th, mode_id, side_sign
+    )
+    return confirmed, break_gap
+
+# trend_range_decision çıktı kodları
+TR_SIDE_NONE = 0
+TR_REGIME_TREND = 1
+TR_REGIME_RANGE = 2
+
+# trend_range_gates bit bayrakları
+TR_GATE_LONG_BREAK = 1 << 0
+TR_GATE_SHORT_BREAK = 1 << 1
+TR_GATE_NEAR_LOWER = 1 << 2
+TR_GATE_NEAR_UPPER = 1 << 3
+TR_GATE_RE_ENTER_LONG = 1 << 4
+TR_GATE_RE_ENTER_SHORT = 1 << 5
+TR_GATE_VOL_OK = 1 << 6
+TR_GATE_RSI_LONG = 1 << 7
+TR_GATE_RSI_SHORT = 1 << 8
+_TR_RANGE_LONG = TR_GATE_NEAR_LOWER | TR_GATE_RE_ENTER_LONG | TR_GATE_VOL_OK | TR_GATE_RSI_LONG
+_TR_RANGE_SHORT = TR_GATE_NEAR_UPPER | TR_GATE_RE_ENTER_SHORT | TR_GATE_VOL_OK | TR_GATE_RSI_SHORT
+
+@njit(cache=True)
+def trend_range_gates(close, prev_close, dchi, dclo, bbu_v, bbl_v, rsi14, vol_last, vol_mean20,
+                      break_buf, vol_mult):
+    """
+    Trend kırılımı ve range bounce karşılaştırmalarını tek seferde değerlendir.
+    NaN girdiler (ilgili dal kapalıyken) ilgili bitleri 0 bırakır.
+    
+    Returns:
+        int: TR_GATE_* bitlerinin birleşimi
+    """
+    flags = int((prev_close > dchi * (1 + break_buf)) and (close >= prev_close)) * TR_GATE_LONG_BREAK
+    flags |= int((prev_close < dclo * (1 - break_buf)) and (close <= prev_close)) * TR_GATE_SHORT_BREAK
+    flags |= int(close <= bbl_v * (1 + 0.0010)) * TR_GATE_NEAR_LOWER
+    flags |= int(close >= bbu_v * (1 - 0.0010)) * TR_GATE_NEAR_UPPER
+    flags |= int((prev_close < bbl_v) and (close > bbl_v)) * TR_GATE_RE_ENTER_LONG
+    flags |= int((prev_close > bbu_v) and (close < bbu_v)) * TR_GATE_RE_ENTER_SHORT
+    flags |= int(vol_last > vol_mean20 * vol_mult) * TR_GATE_VOL_OK
+    flags |= int(rsi14 < 36) * TR_GATE_RSI_LONG
+    flags |= int(rsi14 > 64) * TR_GATE_RSI_SHORT
+    return flags
+
+@njit(cache=True)
+def trend_range_retest(side, break_level, open_, high, low, close, atrv, retest_tol_atr):
+    """
+    Kırılım sonrası retest onayı: seviyeye ATR toleransıyla dokunup güçlü gövdeyle kapanış.
+    
+    Args:
+        side: LONG için 1, SHORT için -1
+        break_level: Donchian kırılım seviyesi
+        open_, high, low, close: Son 15M mumun değerleri
+        atrv: ATR değeri
+        retest_tol_atr: Retest toleransı (ATR çarpanı)
+        
+    Returns:
+        bool: Retest onayı varsa True
+    """
+    tol = retest_tol_atr * atrv
+    rng = high - low
+    rng = rng if rng > 1e-12 else 1e-12
+    if side > 0:
+        return (low <= break_level + tol) and (close > open_) and ((close - open_) / rng > 0.55)
+    return (high >= break_level - tol) and (close < open_) and ((open_ - close) / rng > 0.55)
+
+@njit(cache=True)
+def trend_range_momentum(e9, e21, close, prev_close, bs_last, side):
+    """
+    Kırılım sonrası momentum onayı (EMA9/21 yönü, kapanış yönü ve gövde gücü).
+    
+    Args:
+        e9, e21: 15M kapanış EMA9/EMA21 son değerleri
+        close, prev_close: Son iki 15M kapanış
+        bs_last: Son mumun gövde gücü
+        side: LONG için 1, SHORT için -1
+        
+    Returns:
+        bool: Momentum onayı varsa True
+    """
+    if side > 0:
+        return (e9 > e21) and (close >= prev_close) and (bs_last >= 0.60)
+    return (e9 < e21) and (close <= prev_close) and (bs_last >= 0.60)
+
+@njit(cache=True)
+def trend_range_decision(c, close, prev_close, open_last, high_last, low_last, atrv, bw,
+                         dchi, dclo, bias_code, trend_ok, disp_ok, adx1h, bs_last,
+                         rsi14, bbu_v, bbl_v, vol_last, vol_mean20,
+                         break_buf, adx_trend_min, bwidth_range, retest_tol_atr,
+                         atr_stop_mult, vol_mult, tps_r):
+    """
+    TrendRangeStrategy'nin gösterge sonrası karar mantığı (trend kırılımı + retest/momentum,
+    range bounce, ATR% filtresi ve en iyi adayın seçimi).
+    EMA9/21 sadece kırılım var ve retest yoksa kapanış dizisinden hesaplanır.
+    
+    Args:
+        c: 15M kapanış dizisi (momentum EMA'ları için)
+        close, prev_close, open_last, high_last, low_last: Son mum değerleri
+        atrv, bw, dchi, dclo: ATR, BB genişliği, önceki Donchian üst/alt
+        bias_code: 1H bias (LONG=1, SHORT=-1, diğer=0)
+        trend_ok, disp_ok, adx1h: htf_gate_and_bias çıktıları
+        bs_last: Son mumun gövde gücü
+        rsi14, bbu_v, bbl_v, vol_last, vol_mean20: Range modu girdileri (range kapalıysa NaN)
+        break_buf, adx_trend_min, bwidth_range, retest_tol_atr, atr_stop_mult, vol_mult: config değerleri
+        tps_r: TP R çarpanları
+        
+    Returns:
+        Tuple: (yön kodu, rejim kodu, skor, sl, tp1, tp2, tp3, retest onayı)
+    """
+    best_side = TR_SIDE_NONE
+    best_regime = 0
+    best_score = 0.0
+    best_retest = False
+    flags = trend_range_gates(close, prev_close, dchi, dclo, bbu_v, bbl_v, rsi14,
+                              vol_last, vol_mean20, break_buf, vol_mult)
+    
+    # --- TREND BREAK + (RETEST or MOMENTUM) ---
+    if trend_ok and disp_ok and bias_code != 0:
+        side = bias_code
+        brk = (flags & (TR_GATE_LONG_BREAK if side > 0 else TR_GATE_SHORT_BREAK)) != 0
+            
+        if brk:
+            retest = trend_range_retest(side, dchi if side > 0 else dclo, open_last, high_last,
+                                        low_last, close, atrv, retest_tol_atr)
+            ok = retest
+            if not ok:
+                e9 = _ewm_last(c, 2.0 / (9 + 1.0))
+                e21 = _ewm_last(c, 2.0 / (21 + 1.0))
+                ok = trend_range_momentum(e9, e21, close, prev_close, bs_last, side)
+                    
+            if ok:
+                risk = atr_stop_mult * atrv
+                sl = close - side * risk
+                tp1 = close + (side * risk) * tps_r[0]
+                if side > 0:
+                    den = close - sl
+                    rr1 = (tp1 - close) / (den if den > 1e-9 else 1e-9)
+                else:
+                    den = sl - close
+                    rr1 = (close - tp1) / (den if den > 1e-9 else 1e-9)
+                    
+                adx_part = (adx1h - adx_trend_min) * 1.2
+                score = 40 + (adx_part if adx_part < 20 else 20.0) + (bs_last * 10)
+                if rr1 < 1.0:
+                    score -= 4
+                best_side, best_regime, best_score, best_retest = side, TR_REGIME_TREND, score, retest
+                
+    # --- RANGE MEAN-REVERT (SMART BOUNCE) ---
+    if (not trend_ok) and (bw == bw) and bw <= bwidth_range:
+        bw_part = (1 - bw / (bwidth_range if bwidth_range > 1e-12 else 1e-12)) * 10
+        
+        if ((flags & _TR_RANGE_LONG) == _TR_RANGE_LONG and
+                bs_last >= 0.62 and bias_code != -1):
+            best_side, best_regime, best_retest = 1, TR_REGIME_RANGE, False
+            best_score = 30 + (38 - rsi14 if 38 - rsi14 > 0 else 0.0) + bw_part
+            
+        if ((flags & _TR_RANGE_SHORT) == _TR_RANGE_SHORT and
+                bs_last >= 0.62 and bias_code != 1):
+            score = 30 + (rsi14 - 62 if rsi14 - 62 > 0 else 0.0) + bw_part
+            # Eşit skorda ilk eklenen (LONG) aday kalır
+            if best_side == TR_SIDE_NONE or score > best_score:
+                best_side, best_regime, best_retest = -1, TR_REGIME_RANGE, False
+                best_score = score
+                
+    if best_side == TR_SIDE_NONE:
+        return TR_SIDE_NONE, 0, 0.0, 0.0, 0.0, 0.0, 0.0, False
+        
+    # Ortak ATR% filtresi: aşırı oynak günleri ele
+    if atrv / (close + 1e-12) > 0.035:
+        return TR_SIDE_NONE, 0, 0.0, 0.0, 0.0, 0.0, 0.0, False
+        
+    risk = atr_stop_mult * atrv
+    sl = close - best_side * risk
+    tp1 = close + (best_side * risk) * tps_r[0]
+    tp2 = close + (best_side * risk) * tps_r[1]
+    tp3 = close + (best_side * risk) * tps_r[2]
+    return best_side, best_regime, best_score, sl, tp1, tp2, tp3, best_retest
+
+# trend_range_decision_batch satır düzeni (X[:, i]); çekirdek argüman sırasıyla aynı
+TR_BATCH_FIELDS = (
+    "close", "prev_close", "open_last", "high_last", "low_last", "atrv", "bw",
+    "dchi", "dclo", "bias_code", "trend_ok", "disp_ok", "adx1h", "bs_last",
+    "rsi14", "bbu_v", "bbl_v", "vol_last", "vol_mean20",
+)
+
+@njit(cache=True)
+def trend_range_decision_batch(c_flat, c_off, X, break_buf, adx_trend_min, bwidth_range,
+                               retest_tol_atr, atr_stop_mult, vol_mult, tps_r):
+    """
+    trend_range_decision'ı birden fazla sembol için tek çağrıda çalıştır.
+    
+    Args:
+        c_flat: Tüm sembollerin kapanış dizilerinin ardışık birleşimi
+        c_off: Sembol i'nin kapanışları c_flat[c_off[i]:c_off[i+1]] (uzunluk n+1)
+        X: (n, len(TR_BATCH_FIELDS)) skaler girdiler (bool/int alanlar float olarak)
+        break_buf, adx_trend_min, bwidth_range, retest_tol_atr, atr_stop_mult, vol_mult: config değerleri
+        tps_r: TP R çarpanları
+        
+    Returns:
+        Tuple: (yön kodları, rejim kodları, skorlar, sl, tps (n, 3), retest onayları)
+    """
+    n = X.shape[0]
+    sides = np.zeros(n, dtype=np.int64)
+    regimes = np.zeros(n, dtype=np.int64)
+    scores = np.zeros(n, dtype=np.float64)
+    sls = np.zeros(n, dtype=np.float64)
+    tps = np.zeros((n, 3), dtype=np.float64)
+    retests = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        x = X[i]
+        side, regime, score, sl, tp1, tp2, tp3, retest = trend_range_decision(
+            c_flat[c_off[i]:c_off[i + 1]], x[0], x[1], x[2], x[3], x[4], x[5], x[6],
+            x[7], x[8], int(x[9]), x[10] != 0.0, x[11] != 0.0, x[12], x[13],
+            x[14], x[15], x[16], x[17], x[18],
+            break_buf, adx_trend_min, bwidth_range, retest_tol_atr, atr_stop_mult, vol_mult, tps_r
+        )
+        sides[i] = side
+        regimes[i] = regime
+        scores[i] = score
+        sls[i] = sl
+        tps[i, 0] = tp1
+        tps[i, 1] = tp2
+        tps[i, 2] = tp3
+        retests[i] = retest
+    return sides, regimes, scores, sls, tps, retests
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SMC V2 stratejisinin likidite süpürme ve CHOCH çekirdekleri.
+Girdi olarak sadece numpy dizileri ve skaler değerler alır (numba ile derlenebilir).
+"""
+
+import numpy as np
+
+from .._njit import njit, HAS_NUMBA
+
+# CHOCH yön kodları
+CHOCH_NONE = 0
+CHOCH_LONG = 1
+CHOCH_SHORT = -1
+
+@njit(cache=True)
+def detect_sweeps_njit(wick, close, swing_idx, swing_price, buffer, n_recent, is_high):
+    """
+    Son `n_recent` mumda swing seviyelerinin süpürülmesini bul.
+    High için: fitil seviyenin (1 + buffer) üstünde, kapanış seviyenin altında.
+    Low için: fitil seviyenin (1 - buffer) altında, kapanış seviyenin üstünde.
+    
+    Args:
+        wick: High (is_high=True) veya low dizisi
+        close: Kapanış dizisi
+        swing_idx: Swing indeksleri
+        swing_price: Swing fiyatları
+        buffer: Likidite tamponu
+        n_recent: Geriye bakılacak mum sayısı
+        is_high: True ise swing high süpürmesi ara
+        
+    Returns:
+        Tuple: (swing indeksleri, swing fiyatları, süpürme mum indeksleri) - mum, sonra swing sırasıyla
+    """
+    n = wick.shape[0]
+    m = swing_idx.shape[0]
+    start = max(n - n_recent, 0)
+    
+    out_idx = np.empty((n - start) * m, dtype=np.int64)
+    out_price = np.empty((n - start) * m, dtype=np.float64)
+    out_bar = np.empty((n - start) * m, dtype=np.int64)
+    k = 0
+    
+    for i in range(start, n):
+        for j in range(m):
+            p = swing_price[j]
+            if is_high:
+                hit = wick[i] > p * (1 + buffer) and close[i] < p
+            else:
+                hit = wick[i] < p * (1 - buffer) and close[i] > p
+            if hit:
+                out_idx[k] = swing_idx[j]
+                out_price[k] = p
+                out_bar[k] = i
+                k += 1
+                
+    return out_idx[:k], out_price[:k], out_bar[:k]
+
+def detect_sweeps(wick, close, swing_idx, swing_price, buffer, n_recent, is_high):
+    """
+    detect_sweeps_njit ile aynı sonucu verir. numba yoksa (mum x swing)
+    maskesi broadcasting ile tek seferde kurulur; np.argwhere satır öncelikli
+    döndüğü için sıra döngüyle aynıdır.
+    
+    Not: numexpr.evaluate ile aynı ifade (5x10 ile 1000x1000 arası matrislerde)
+    düz numpy broadcasting'den 2-4 kat yavaş ölçüldü; bu yüzden kullanılmıyor.
+    """
+    if HAS_NUMBA:
+        return detect_sweeps_njit(wick, close, swing_idx, swing_price, buffer, n_recent, is_high)
+        
+    start = max(len(wick) - n_recent, 0)
+    wick_last = wick[start:, None]
+    close_last = close[start:, None]
+    
+    if is_high:
+        # Wick above, close below
+        sweep_mask = (wick_last > swing_price[None, :] * (1 + buffer)) & (close_last < swing_price[None, :])
+    else:
+        # Wick below, close above
+        sweep_mask = (wick_last < swing_price[None, :] * (1 - buffer)) & (close_last > swing_price[None, :])
+        
+    pairs = np.argwhere(sweep_mask)
+    bars, cols = pairs[:, 0], pairs[:, 1]
+    return swing_idx[cols], swing_price[cols], (bars + start).astype(np.int64)
+
+@njit(cache=True)
+def detect_choch_njit(current_price, sh_idx, sh_price, sl_idx, sl_price,
+                      swept_low_price, swept_low_bar, swept_high_price, swept_high_bar, bos_eps):
+    """
+    Süpürmeden sonraki ilk karşı swing'in kırılmasıyla CHOCH tespiti.
+    Swing indeksleri artan sırada olduğundan ilk karşı swing searchsorted ile bulunur.
+    Önce LONG (low süpürmeleri), sonra SHORT (high süpürmeleri) taranır; son bulunan döner.
+    
+    Returns:
+        Tuple: (yön kodu, süpürülen fiyat, süpürme mum indeksi, kırılan fiyat, kırılan swing indeksi)
+    """
+    direction = CHOCH_NONE
+    sweep_price = np.nan
+    sweep_bar = -1
+    broken_price = np.nan
+    broken_idx = -1
+    
+    # CHOCH for LONG (after low sweep)
+    next_high = np.searchsorted(sh_idx, swept_low_bar, side="right")
+    for s in range(swept_low_bar.shape[0]):
+        j = next_high[s]
+        if j < sh_idx.shape[0] and current_price > sh_price[j] * (1 + bos_eps):
+            direction = CHOCH_LONG
+            sweep_price = swept_low_price[s]
+            sweep_bar = swept_low_bar[s]
+            broken_price = sh_price[j]
+            broken_idx = sh_idx[j]
+                
+    # CHOCH for SHORT (after high sweep)
+    next_low = np.searchsorted(sl_idx, swept_high_bar, side="right")
+    for s in range(swept_high_bar.shape[0]):
+        j = next_low[s]
+        if j < sl_idx.shape[0] and current_price < sl_price[j] * (1 - bos_eps):
+            direction = CHOCH_SHORT
+            sweep_price = swept_high_price[s]
+            sweep_bar = swept_high_bar[s]
+            broken_price = sl_price[j]
+            broken_idx = sl_idx[j]
+                
+    return direction, sweep_price, sweep_bar, broken_price, broken_idx
@@ -6,16 +6,17 @@ Temel strateji sınıfı. Tüm stratejiler bundan türer.
 """
 
 import pandas as pd
+import numpy as np
 from abc import ABC, abstractmethod
 from typing import Dict, Optional, Any, Union, List, Tuple
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from .. import config
 from ..indicators import atr_wilder
 
+# TP R çarpanları (her çağrıda yeniden dizi oluşturmamak için modül yüklenirken hazırlanır;
+# compute_sl_tp ve TrendRange karar çekirdeği aynı diziyi kullanır)
+TPS_R_ARRAY = np.asarray(config.TPS_R, dtype=np.float64)
+
 class BaseStrategy(ABC):
     """
     Strateji sınıflarının temel sınıfı.
@@ -56,27 +57,16 @@ class BaseStrategy(ABC):
         Returns:
             Tuple: (SL seviyesi, (TP1, TP2, TP3) seviyeleri)
         """
+        sign = 1.0 if side == "LONG" else -1.0
         risk = config.ATR_STOP_MULT * atrv
         
-        if side == "LONG":
-            sl  = entry - risk
-            tps = (
-                entry + config.TPS_R[0] * risk, 
-                entry + config.TPS_R[1] * risk, 
-                entry + config.TPS_R[2] * risk
-            )
-        else:
-            sl  = entry + risk
-            tps = (
-                entry - config.TPS_R[0] * risk, 
-                entry - config.TPS_R[1] * risk, 
-                entry - config.TPS_R[2] * risk
-            )
+        sl = entry - sign * risk
+        tps = entry + (sign * risk) * TPS_R_ARRAY
             
-        return sl, tps
+        return sl, (float(tps[0]), float(tps[1]), float(tps[2]))
     
     def create_signal_dict(self, side: str, entry: float, sl: float, tps: Tuple[float, float, float], 
-                          score: float, reason: str) -> Dict[str, Any]:
+                          score: float, reason: str, defer_p: bool = False) -> Dict[str, Any]:
         """
         Sinyal sözlüğü oluştur.
         
@@ -87,6 +77,7 @@ class BaseStrategy(ABC):
             tps: (TP1, TP2, TP3) değerlerini içeren tuple
             score: Sinyal skoru
             reason: Sinyalin açıklaması
+            defer_p: True ise "p" None bırakılır, finalize_batch ile toplu hesaplanır
             
         Returns:
             Dict: Tam sinyal bilgisini içeren sözlük
@@ -100,7 +91,31 @@ class BaseStrategy(ABC):
             "sl": sl,
             "tps": tps,
             "score": score,
-            "p": sigmoid((score - 65) / 7),
+            "p": None if defer_p else sigmoid((score - 65) / 7),
             "regime": self.regime,
             "reason": reason
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def finalize_batch(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Sinyal listesinin "p" değerlerini tek vektörel sigmoid geçişiyle hesapla.
+        
+        Args:
+            signals: create_signal_dict(..., defer_p=True) ile oluşturulmuş sinyaller
+            
+        Returns:
+            List: Aynı liste ("p" alanları doldurulmuş olarak)
+        """
+        if not signals:
+            return signals
+            
+        from ..utils import sigmoid_arr
+        
+        scores = np.fromiter((s["score"] for s in signals), dtype=np.float64, count=len(signals))
+        probs = sigmoid_arr((scores - 65) / 7)
+        
+        for signal, p in zip(signals, probs.tolist()):
+            signal["p"] = p
+            
+        return signals
\ No newline at end of file
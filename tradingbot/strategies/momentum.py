@@ -7,20 +7,27 @@ DC/EMA kırılımları + momentum onayı ile erken tetikleme sistemi.
 """
 
 import pandas as pd
+import numpy as np
 import math
 from typing import Dict, Optional, Any
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from .. import config
 from ..utils import sigmoid
 from .base import BaseStrategy
+from .._njit import HAS_NUMBA
+from ._kernels import (
+    momentum_decision, _ewm_last, _true_range, MOMO_MODE_IDS, MOMO_MODE_DEFAULT
+)
 from ..indicators import (
-    atr_wilder, donchian, ema, body_strength, htf_gate_and_bias
+    atr_wilder, ema, htf_gate_and_bias
 )
 
+# Rejim tipine göre sabit sinyal açıklaması önekleri
+_REASON_PREFIX = {
+    "PREMO": "Momentum kırılım (erken) | ADX1H=",
+    "MO": "Momentum kırılım  | ADX1H=",
+}
+
 class MomentumStrategy(BaseStrategy):
     """
     Momentum kırılım stratejisi.
@@ -44,162 +51,67 @@ class MomentumStrategy(BaseStrategy):
         """
         if not config.EARLY_TRIGGERS_ON:
             return None
-            
-        o, c, h, l, v = df15["o"], df15["c"], df15["h"], df15["l"], df15["v"]
-        atrv = float(atr_wilder(h, l, c, config.ATR_PERIOD).iloc[-1])
-        close = float(c.iloc[-1])
         
+        # 1H bias yoksa 15M göstergelerini hiç hesaplama
         bias, _, adx1h, _ = htf_gate_and_bias(df1h)
+        if bias not in ("LONG", "SHORT"):
+            return None
         
-        # EMA'lar
-        e9 = ema(c, 9)
-        e21 = ema(c, 21)
-        
-        # Donchian kanalları
-        dc_hi, dc_lo = donchian(h, l, config.DONCHIAN_WIN)
-        dchi = float(dc_hi.shift(1).iloc[-1])
-        dclo = float(dc_lo.shift(1).iloc[-1])
-        
-        prebreak_dist = config.PREBREAK_ATR_X * atrv
-        
-        candidates = []
-        
-        # === LONG MOMENTUM ===
-        if bias == "LONG":
-            # Donchian kırılımına yakın mı?
-            near_dc_break = close >= (dchi - prebreak_dist)
+        # Sıcak yolda kullanılan config değerleri (config runtime'da değişebildiği için her çağrıda okunur)
+        ATR_P = config.ATR_PERIOD
+        DCW = config.DONCHIAN_WIN
+        PREBREAK_X = config.PREBREAK_ATR_X
+        ADX_MIN = config.ADX_TREND_MIN
+        ADX_BONUS = config.EARLY_ADX_BONUS
             
-            # EMA momentum onayı
-            ema_momentum = (e9.iloc[-1] > e21.iloc[-1]) and (c.iloc[-1] > e9.iloc[-1])
-            
-            if near_dc_break and ema_momentum and self._momentum_confirm_long(df15):
-                regime_type = "PREMO" if close < dchi else "MO"
-                
-                sl, tps = self.compute_sl_tp("LONG", close, atrv)
-                
-                # Skor hesaplama
-                score = 55
-                if adx1h >= config.ADX_TREND_MIN:
-                    score += config.EARLY_ADX_BONUS
-                    
-                # Erken tetikleme bonusu
-                early_bonus = max(0, (dchi - close) / (prebreak_dist + 1e-9)) * 3
-                
-                reason = f"Momentum kırılım {'(erken)' if regime_type == 'PREMO' else ''} | ADX1H={adx1h:.1f}"
-                
-                signal = self.create_signal_dict(
-                    side="LONG",
-                    entry=close,
-                    sl=sl,
-                    tps=tps,
-                    score=score,
-                    reason=reason
-                )
-                signal["regime"] = regime_type
-                signal["_early_bonus"] = early_bonus
-                candidates.append(signal)
+        o, c, h, l, v = df15["o"], df15["c"], df15["h"], df15["l"], df15["v"]
+        c_a, h_a, l_a = c.to_numpy(dtype=np.float64), h.to_numpy(dtype=np.float64), l.to_numpy(dtype=np.float64)
         
-        # === SHORT MOMENTUM ===
-        elif bias == "SHORT":
-            # Donchian kırılımına yakın mı?
-            near_dc_break = close <= (dclo + prebreak_dist)
-            
-            # EMA momentum onayı
-            ema_momentum = (e9.iloc[-1] < e21.iloc[-1]) and (c.iloc[-1] < e9.iloc[-1])
+        # Sadece ATR/EMA girdileri arka uca göre hazırlanır (ikisi birebir aynı sonucu verir)
+        if HAS_NUMBA:
+            atrv = float(_ewm_last(_true_range(h_a, l_a, c_a), 1.0 / ATR_P))
+            e9 = float(_ewm_last(c_a, 2.0 / (9 + 1.0)))
+            e21 = float(_ewm_last(c_a, 2.0 / (21 + 1.0)))
+        else:
+            atrv = float(atr_wilder(h, l, c, ATR_P).to_numpy()[-1])
+            e9 = float(ema(c, 9).to_numpy()[-1])
+            e21 = float(ema(c, 21).to_numpy()[-1])
             
-            if near_dc_break and ema_momentum and self._momentum_confirm_short(df15):
-                regime_type = "PREMO" if close > dclo else "MO"
-                
-                sl, tps = self.compute_sl_tp("SHORT", close, atrv)
-                
-                # Skor hesaplama
-                score = 55
-                if adx1h >= config.ADX_TREND_MIN:
-                    score += config.EARLY_ADX_BONUS
-                    
-                # Erken tetikleme bonusu
-                early_bonus = max(0, (close - dclo) / (prebreak_dist + 1e-9)) * 3
-                
-                reason = f"Momentum kırılım {'(erken)' if regime_type == 'PREMO' else ''} | ADX1H={adx1h:.1f}"
-                
-                signal = self.create_signal_dict(
-                    side="SHORT",
-                    entry=close,
-                    sl=sl,
-                    tps=tps,
-                    score=score,
-                    reason=reason
-                )
-                signal["regime"] = regime_type
-                signal["_early_bonus"] = early_bonus
-                candidates.append(signal)
-        
-        return candidates[0] if candidates else None
-    
-    def _momentum_confirm_long(self, df15: pd.DataFrame) -> bool:
-        """
-        Long yönünde momentum onayı.
-        
-        Args:
-            df15: Düşük zaman dilimi DataFrame'i (15 dakika)
+        close = float(c_a[-1])
+        prebreak_dist = PREBREAK_X * atrv
+        confirmed, break_gap = momentum_decision(
+            o.to_numpy(dtype=np.float64), h_a, l_a, c_a, v.to_numpy(dtype=np.float64),
+            atrv, e9, e21, DCW, PREBREAK_X, 1.0 if bias == "LONG" else -1.0,
+            config.EARLY_MOMO_BODY_MIN, config.EARLY_REL_VOL, config.MOMO_NET_BODY_TH,
+            MOMO_MODE_IDS.get(config.MOMO_CONFIRM_MODE, MOMO_MODE_DEFAULT)
+        )
+        
+        # Her iki yön için ortak sinyal yolu
+        if confirmed:
+            regime_type = "PREMO" if break_gap > 0 else "MO"
             
-        Returns:
-            bool: Momentum onayı varsa True
-        """
-        return self._momentum_check(df15, "LONG")
-    
-    def _momentum_confirm_short(self, df15: pd.DataFrame) -> bool:
-        """
-        Short yönünde momentum onayı.
-        
-        Args:
-            df15: Düşük zaman dilimi DataFrame'i (15 dakika)
+            sl, tps = self.compute_sl_tp(bias, close, atrv)
             
-        Returns:
-            bool: Momentum onayı varsa True
-        """
-        return self._momentum_check(df15, "SHORT")
-    
-    def _momentum_check(self, df15: pd.DataFrame, side: str) -> bool:
-        """
-        Momentum onay kontrolü.
-        
-        Args:
-            df15: Düşük zaman dilimi DataFrame'i (15 dakika)
-            side: İşlem yönü ("LONG" veya "SHORT")
+            # Skor hesaplama
+            score = 55
+            if adx1h >= ADX_MIN:
+                score += ADX_BONUS
+                
+            # Erken tetikleme bonusu
+            early_bonus = max(0, break_gap / (prebreak_dist + 1e-9)) * 3
             
-        Returns:
-            bool: Momentum onayı varsa True
-        """
-        if config.MOMO_CONFIRM_MODE == "off":
-            return True
+            reason = _REASON_PREFIX[regime_type] + format(adx1h, ".1f")
             
-        o, c, h, l, v = df15["o"], df15["c"], df15["h"], df15["l"], df15["v"]
-        
-        # Body strength kontrolü
-        bs = body_strength(o, c, h, l)
-        body_ok = bs.iloc[-1] >= config.EARLY_MOMO_BODY_MIN
-        
-        # Hacim kontrolü
-        vol_ma = v.rolling(20).mean()
-        vol_ok = v.iloc[-1] > vol_ma.iloc[-1] * config.EARLY_REL_VOL
-        
-        # Net gövde kontrolü (son 3 mumun net gövdesi)
-        net_body = 0.0
-        for i in range(-3, 0):
-            if side == "LONG":
-                net_body += max(0, c.iloc[i] - o.iloc[i])
-            else:
-                net_body += max(0, o.iloc[i] - c.iloc[i])
-        
-        total_range = sum(h.iloc[i] - l.iloc[i] for i in range(-3, 0))
-        net_ok = (net_body / max(1e-9, total_range)) >= config.MOMO_NET_BODY_TH
-        
-        if config.MOMO_CONFIRM_MODE == "strict3":
-            return body_ok and vol_ok and net_ok
-        elif config.MOMO_CONFIRM_MODE == "2of3":
-            return sum([body_ok, vol_ok, net_ok]) >= 2
-        elif config.MOMO_CONFIRM_MODE == "net_body":
-            return net_ok
-        else:
-            return body_ok or vol_ok
\ No newline at end of file
+            signal = self.create_signal_dict(
+                side=bias,
+                entry=close,
+                sl=sl,
+                tps=tps,
+                score=score,
+                reason=reason
+            )
+            signal["regime"] = regime_type
+            signal["_early_bonus"] = early_bonus
+            return signal
+        
+        return None
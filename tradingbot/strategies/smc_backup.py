@@ -9,10 +9,6 @@ Likidite süpürme -> CHOCH (Change of Character) + FVG/OTE tabanlı strateji.
 import pandas as pd
 from typing import Dict, Optional, Any
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from .. import config
 from ..utils import sigmoid
 from .base import BaseStrategy
@@ -6,18 +6,183 @@ SMC V2 - Gerçek Smart Money Concepts Stratejisi
 15 dakika timeframe'de market structure, likidite avcılığı ve OTE retest mantığı
 """
 
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Dict, Optional, Any, List, Tuple
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from .. import config
-from ..utils import sigmoid
+from ..utils import sigmoid, bar_times
 from .base import BaseStrategy
-from ..indicators import atr_wilder, ema, rsi
+from ..indicators import rsi
+from ._kernels import _ewm_last
+from ._smc_kernels import detect_sweeps, detect_choch_njit, CHOCH_LONG, CHOCH_SHORT
+
+# _ohlcv_arrays bloğundaki kolon sırası
+_OHLCV_COLS = ("h", "l", "c", "v", "o")
+_COL = {k: i for i, k in enumerate(_OHLCV_COLS)}
+
+# (sembol, periyot) -> (ilk mum zamanı, son kapanmış mum zamanı, o mumun kapanışı,
+#                       kapanmış mum sayısı, o mumdaki EMA)
+_ema_state: Dict[tuple, tuple] = {}
+_INDICATOR_CACHE_MAX = 256
+# Bu kadar yeni kapanmış mumdan fazlası varsa tam hesaplamaya dön
+_EMA_MAX_STEPS = 4
+
+# (sembol, 15M/1H son mum parmak izi) -> analyze sonucu (LRU)
+_signal_cache: "OrderedDict[tuple, Optional[Dict[str, Any]]]" = OrderedDict()
+_SIGNAL_CACHE_MAX = 1024
+
+def _find_swings(arr: np.ndarray, width: int, start: int, stop: int, lows: bool = False,
+                 last: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    arr[start:stop] aralığında her iki yanındaki `width` mumdan kesin büyük
+    (lows=True ise kesin küçük) swing noktalarını bul.
+    
+    Args:
+        arr: Yüksek (veya düşük) fiyat dizisi
+        width: Her iki yanda karşılaştırılacak mum sayısı
+        start: İlk aday indeks
+        stop: Son aday indeks (hariç)
+        lows: True ise swing low ara
+        last: Verilirse sadece en sondaki `last` swing döner
+        
+    Returns:
+        Tuple: (int64 indeks dizisi, float64 fiyat dizisi)
+    """
+    start = max(start, width)
+    stop = min(stop, len(arr) - width)
+    if stop <= start:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        
+    center = arr[start:stop]
+    mask = np.ones(stop - start, dtype=bool)
+    for k in range(1, width + 1):
+        left = arr[start - k:stop - k]
+        right = arr[start + k:stop + k]
+        if lows:
+            mask &= (center < left) & (center < right)
+        else:
+            mask &= (center > left) & (center > right)
+            
+    idx = np.flatnonzero(mask) + start
+    if last is not None:
+        idx = idx[-last:]
+    return idx.astype(np.int64), arr[idx].astype(np.float64)
+
+def _swings_to_arrays(points: List[tuple]) -> Tuple[np.ndarray, ...]:
+    """
+    (swing indeksi, fiyat, mum) süpürme tuple listesini çekirdekler için sütun dizilerine çevir.
+    
+    Args:
+        points: Süpürme tuple listesi
+        
+    Returns:
+        Tuple: (swing indeksleri, fiyatlar, süpürme mumları)
+    """
+    idx = np.fromiter((p[0] for p in points), dtype=np.int64, count=len(points))
+    price = np.fromiter((p[1] for p in points), dtype=np.float64, count=len(points))
+    bar = np.fromiter((p[2] for p in points), dtype=np.int64, count=len(points))
+    return idx, price, bar
+
+def _ohlcv_arrays(df: pd.DataFrame, dtype: type = np.float64) -> Dict[str, Any]:
+    """
+    15M kolonlarını analyze başına tek bir (kolon x mum) bloğa çevir.
+    Blok kolon bazında bitişik olduğundan her kolon sıralı okunan bir görünümdür.
+    
+    Args:
+        df: OHLCV DataFrame ("o" kolonu opsiyonel)
+        dtype: Tarama dizilerinin tipi (float32 bant genişliğini yarıya indirir)
+        
+    Returns:
+        Dict: "h", "l", "c", "v", "o" -> dizi görünümü ("o" yoksa None),
+              "c_last" -> sinyal fiyatları için float64 son kapanış
+    """
+    has_open = "o" in df.columns
+    cols = _OHLCV_COLS if has_open else _OHLCV_COLS[:-1]
+    block = np.ascontiguousarray(df[list(cols)].to_numpy(dtype=np.float64).T, dtype=dtype)
+    
+    arrays = {k: block[_COL[k]] for k in cols}
+    if not has_open:
+        arrays["o"] = None
+    arrays["c_last"] = df["c"].to_numpy(dtype=np.float64)[-1]
+    return arrays
+
+def _find_retest_confirmation(arrays: Dict[str, Optional[np.ndarray]], touch: np.ndarray,
+                              ote_min: float, ote_max: float, side_sign: int) -> Optional[int]:
+    """
+    Son SMC_RETEST_CANDLES mumda OTE bölgesine değen (touch) mumu ve onu izleyen
+    güçlü gövdeli, hacimli onay mumunu ara. (mum, sonraki mum) çiftleri
+    sliding_window_view ile tek seferde değerlendirilir.
+    
+    Args:
+        arrays: _ohlcv_arrays çıktısı
+        touch: LONG için low, SHORT için high dizisi
+        ote_min: OTE bölgesi alt sınırı
+        ote_max: OTE bölgesi üst sınırı
+        side_sign: LONG için 1 (boğa mumu), SHORT için -1 (ayı mumu)
+        
+    Returns:
+        Optional[int]: İlk onay mumunun indeksi, yoksa None
+    """
+    RETEST_N = config.SMC_RETEST_CANDLES
+    STR_THR = config.SMC_CONFIRMATION_STRENGTH
+    VOL_F = config.SMC_VOLUME_FACTOR
+    
+    close = arrays["c"]
+    n = len(close)
+    # Son mum onay mumu olamaz; retest mumu en fazla n-2
+    start = max(n - RETEST_N, 0)
+    if start > n - 2:
+        return None
+        
+    def pairs(x: np.ndarray) -> np.ndarray:
+        return sliding_window_view(x[start:], 2)
+        
+    close_w = pairs(close)
+    high_w = pairs(arrays["h"])
+    low_w = pairs(arrays["l"])
+    # Hacim eşiği: onay mumu hacmi > retest mumu hacmi * faktör
+    vol = arrays["v"]
+    vol_thr = vol[start:n - 1] * VOL_F
+    # Open yoksa previous close kullan
+    open_next = arrays["o"][start + 1:] if arrays["o"] is not None else close_w[:, 0]
+    close_next = close_w[:, 1]
+    
+    touch_tail = touch[start:n - 1]
+    body = close_next - open_next
+    body_strength = np.abs(body) / (high_w[:, 1] - low_w[:, 1] + 1e-10)
+    
+    # Tüm koşullar tek maskede birleşir (yön dahil dallanma yok)
+    valid = ote_min <= touch_tail
+    valid &= touch_tail <= ote_max
+    valid &= np.sign(body) == side_sign
+    valid &= body_strength >= STR_THR
+    valid &= vol[start + 1:] > vol_thr
+    
+    first = int(np.argmax(valid))
+    return start + first + 1 if valid[first] else None
+
+def _ema_step(weighted: float, cur: float, alpha: float) -> float:
+    """
+    pandas ewm(adjust=False) tek adımı (önceki değer ve cur gözlenmiş).
+    Bölme sırası pandas ile aynı tutulur; sonuç tam hesaplamayla birebir aynıdır.
+    """
+    old_wt = 1.0 - alpha
+    if weighted == cur:
+        return weighted
+    return (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+
+def _last_bar_key(df: pd.DataFrame) -> tuple:
+    """
+    Son mumun parmak izi: (uzunluk, zaman, h, l, c).
+    Son mum canlı olabildiği için zaman tek başına yeterli değildir.
+    """
+    if len(df) == 0:
+        return (0,)
+    ts = df["time"].iat[-1] if "time" in df.columns else df.index[-1]
+    return (len(df), ts, df["h"].iat[-1], df["l"].iat[-1], df["c"].iat[-1])
 
 class SMCv2Strategy(BaseStrategy):
     """
@@ -36,16 +201,52 @@ class SMCv2Strategy(BaseStrategy):
         if len(df15) < config.SMC_STRUCTURE_LOOKBACK:
             return None
             
+        # Aynı mumlar için tekrar sorgu: önceki sonucu döndür
+        cache_key = (self.symbol, _last_bar_key(df15), _last_bar_key(df1h))
+        if cache_key in _signal_cache:
+            _signal_cache.move_to_end(cache_key)
+            hit = _signal_cache[cache_key]
+            # Çağıran sinyali değiştirebilir (skor, p); kopya döndür
+            return dict(hit) if hit is not None else None
+            
+        signal = self._analyze_uncached(df15, df1h)
+        
+        _signal_cache[cache_key] = dict(signal) if signal is not None else None
+        if len(_signal_cache) > _SIGNAL_CACHE_MAX:
+            _signal_cache.popitem(last=False)
+        return signal
+    
+    def _analyze_uncached(self, df15: pd.DataFrame, df1h: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """
+        analyze gövdesi (önbelleksiz)
+        """
         # HTF Bias (1H) 
         htf_bias = self._get_htf_bias(df1h)
         
+        # 15M kolonları tek seferde numpy'a
+        arrays = _ohlcv_arrays(df15, np.float32 if config.SMC_FLOAT32_SCANS else np.float64)
+        
         # Market Structure Analysis (15M) - GEVŞEK
-        structure = self._analyze_market_structure_simple(df15)
+        structure = self._analyze_market_structure_simple(arrays)
         if not structure:
             return None
             
         # Simple SMC Signal
-        return self._create_simple_smc_signal(df15, structure, htf_bias)
+        return self._create_simple_smc_signal(arrays, structure, htf_bias)
+    
+    @classmethod
+    def analyze_batch(cls, payloads: List[Tuple[str, pd.DataFrame, pd.DataFrame]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Birden fazla sembolü aynı süreçte analiz et. Sembol başına iş ~1 ms olduğu için
+        süreç havuzu (DataFrame pickle + spawn başlangıcı) kazançtan pahalıya geliyor.
+        
+        Args:
+            payloads: (sembol, df15, df1h) listesi
+            
+        Returns:
+            Dict: sembol -> sinyal (veya None)
+        """
+        return {symbol: cls(symbol).analyze(df15, df1h) for symbol, df15, df1h in payloads}
     
     def _get_htf_bias(self, df1h: pd.DataFrame) -> str:
         """
@@ -55,65 +256,94 @@ class SMCv2Strategy(BaseStrategy):
             return "LONG"  # Default LONG
             
         close = df1h["c"]
-        
-        # EMA 20 bias (daha hızlı)
-        ema20 = ema(close, 20)
         current_price = close.iloc[-1]
         
+        # EMA 20 bias (daha hızlı) - aynı mum için önbellekten
+        ema20_last = self._cached_ema_last(df1h, 20)
+        
         # Basit EMA bias
-        if current_price > ema20.iloc[-1]:
+        if current_price > ema20_last:
             return "LONG"
         else:
             return "SHORT"
     
-    def _analyze_market_structure_simple(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _cached_ema_last(self, df: pd.DataFrame, n: int) -> float:
+        """
+        EMA(n) son değerini artımlı hesapla.
+        Kapanmış mumlardaki EMA durumu (sembol, periyot) bazında saklanır; aynı seri
+        büyüdüğünde veya sadece canlı mum değiştiğinde e_t = a*c_t + (1-a)*e_(t-1)
+        adımıyla O(1) güncellenir. Seri başı kaydıysa veya son kapanmış mum (zaman/kapanış)
+        değiştiyse tam hesaplama _ewm_last çekirdeğiyle yapılır (ema() ile birebir aynı).
+        """
+        c = df["c"].to_numpy(dtype=np.float64)
+        ts = bar_times(df)
+        n_closed = len(c) - 1
+        alpha = 1.0 / (1.0 + (n - 1) / 2.0)  # pandas span -> alpha dönüşümü
+        
+        key = (self.symbol, n)
+        state = _ema_state.get(key)
+        if state is not None:
+            first_ts, prev_ts, prev_close, prev_closed, weighted = state
+            # Son kapanmış mumun zamanı ve kapanışı da eşleşmeli
+            if (prev_closed <= n_closed < prev_closed + _EMA_MAX_STEPS
+                    and ts[0] == first_ts and ts[prev_closed - 1] == prev_ts
+                    and c[prev_closed - 1] == prev_close):
+                steps = c[prev_closed:]
+                if not np.isnan(steps).any():
+                    for cur in steps[:-1]:
+                        weighted = _ema_step(weighted, cur, alpha)
+                    if len(steps) > 1:
+                        _ema_state[key] = (first_ts, ts[-2], c[-2], n_closed, weighted)
+                    return float(_ema_step(weighted, steps[-1], alpha))
+                    
+        # Tam hesaplama: ema(df["c"], n) ile birebir aynı (pandas ewm(adjust=False) çekirdeği)
+        if np.isnan(c[-2]):
+            # NaN boşluğu sonraki adımın ağırlığını değiştirir; durum saklanmaz
+            return float(_ewm_last(c, alpha))
+            
+        e_closed = float(_ewm_last(c[:-1], alpha))
+        if key not in _ema_state and len(_ema_state) >= _INDICATOR_CACHE_MAX:
+            _ema_state.pop(next(iter(_ema_state)))
+        _ema_state[key] = (ts[0], ts[-2], c[-2], n_closed, e_closed)
+        # Kapanmış mumdan canlı muma tek adım (canlı kapanış NaN ise değer değişmez)
+        return float(_ewm_last(np.array([e_closed, c[-1]]), alpha))
+    
+    def _analyze_market_structure_simple(self, arrays: Dict[str, np.ndarray]) -> Optional[Dict]:
         """
         Basit market structure - sadece son swing'lere bak
         """
-        high = df["h"]
-        low = df["l"]
-        
-        # Son 15 mumda basit swing detection
-        swing_highs = []
-        swing_lows = []
+        high = arrays["h"]
+        low = arrays["l"]
+        n = len(high)
         
-        for i in range(len(df) - 15, len(df) - 2):
-            if i <= 1 or i >= len(df) - 1:
-                continue
-                
-            # Basit swing high
-            if high.iloc[i] > high.iloc[i-1] and high.iloc[i] > high.iloc[i+1]:
-                swing_highs.append((i, high.iloc[i]))
-                
-            # Basit swing low  
-            if low.iloc[i] < low.iloc[i-1] and low.iloc[i] < low.iloc[i+1]:
-                swing_lows.append((i, low.iloc[i]))
+        # Son 15 mumda basit swing detection (1 komşu) - sinyal sadece son 3 swing'e bakar
+        start = max(n - 15, 2)
+        sh_idx, sh_price = _find_swings(high, 1, start, n - 2, last=3)
+        sl_idx, sl_price = _find_swings(low, 1, start, n - 2, lows=True, last=3)
         
-        if len(swing_highs) >= 1 and len(swing_lows) >= 1:
+        if len(sh_idx) >= 1 and len(sl_idx) >= 1:
             return {
-                "swing_highs": swing_highs,
-                "swing_lows": swing_lows
+                "sh_idx": sh_idx,
+                "sh_price": sh_price,
+                "sl_idx": sl_idx,
+                "sl_price": sl_price
             }
         return None
 
-    def _create_simple_smc_signal(self, df: pd.DataFrame, structure: Dict, htf_bias: str) -> Optional[Dict[str, Any]]:
+    def _create_simple_smc_signal(self, arrays: Dict[str, np.ndarray], structure: Dict, htf_bias: str) -> Optional[Dict[str, Any]]:
         """
         Basit SMC sinyal - HTF bias yönünde swing break
         """
-        high = df["h"]
-        low = df["l"] 
-        close = df["c"]
-        current_price = close.iloc[-1]
+        TPS = config.TPS_R
+        current_price = arrays["c_last"]
         
-        swing_highs = structure["swing_highs"]
-        swing_lows = structure["swing_lows"]
+        sh_price = structure["sh_price"]
+        sl_price = structure["sl_price"]
         
-        if htf_bias == "LONG" and swing_lows:
+        if htf_bias == "LONG" and len(sl_price):
             # LONG - Son swing low'u kır
-            last_low = min([x[1] for x in swing_lows[-3:]] if len(swing_lows) >= 3 else [x[1] for x in swing_lows])
+            last_low = float(sl_price[-3:].min())
             if current_price > last_low * 1.002:  # %0.2 kırım
-                # ✅ DÜZELTİLDİ: ATR bazlı SL/TP hesaplama
-                atrv = float(atr_wilder(df["h"], df["l"], df["c"], 14).iloc[-1])
                 sl = last_low * 0.998
                 risk = abs(current_price - sl)
                 
@@ -124,21 +354,19 @@ class SMCv2Strategy(BaseStrategy):
                     "entry": current_price,
                     "sl": sl,
                     "tps": (  # ✅ DÜZELTİLDİ: 3 TP tuple formatında
-                        current_price + risk * config.TPS_R[0], 
-                        current_price + risk * config.TPS_R[1], 
-                        current_price + risk * config.TPS_R[2]
+                        current_price + risk * TPS[0], 
+                        current_price + risk * TPS[1], 
+                        current_price + risk * TPS[2]
                     ),
                     "regime": "SMC_V2_SIMPLE",
                     "confidence": 0.7,
                     "reason": "SMC V2: HTF LONG bias + Swing low break"
                 }
                 
-        elif htf_bias == "SHORT" and swing_highs:
+        elif htf_bias == "SHORT" and len(sh_price):
             # SHORT - Son swing high'ı kır
-            last_high = max([x[1] for x in swing_highs[-3:]] if len(swing_highs) >= 3 else [x[1] for x in swing_highs])
+            last_high = float(sh_price[-3:].max())
             if current_price < last_high * 0.998:  # %0.2 kırım
-                # ✅ DÜZELTİLDİ: ATR bazlı SL/TP hesaplama
-                atrv = float(atr_wilder(df["h"], df["l"], df["c"], 14).iloc[-1])
                 sl = last_high * 1.002
                 risk = abs(sl - current_price)
                 
@@ -149,9 +377,9 @@ class SMCv2Strategy(BaseStrategy):
                     "entry": current_price,
                     "sl": sl,
                     "tps": (  # ✅ DÜZELTİLDİ: 3 TP tuple formatında
-                        current_price - risk * config.TPS_R[0], 
-                        current_price - risk * config.TPS_R[1], 
-                        current_price - risk * config.TPS_R[2]
+                        current_price - risk * TPS[0], 
+                        current_price - risk * TPS[1], 
+                        current_price - risk * TPS[2]
                     ),
                     "regime": "SMC_V2_SIMPLE",
                     "confidence": 0.7,
@@ -160,96 +388,75 @@ class SMCv2Strategy(BaseStrategy):
         
         return None
     
-    def _analyze_market_structure(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _analyze_market_structure(self, arrays: Dict[str, np.ndarray]) -> Optional[Dict]:
         """
         15M market structure analizi - swing highs/lows detection
         """
-        high = df["h"]
-        low = df["l"] 
-        close = df["c"]
-        
-        swing_highs = []
-        swing_lows = []
+        high = arrays["h"]
+        low = arrays["l"]
+        close = arrays["c"]
+        n = len(close)
         
         # Swing points detection (son 50 mum içinde)
-        lookback = min(config.SMC_STRUCTURE_LOOKBACK, len(df) - 5)
-        start_idx = len(df) - lookback
-        
-        for i in range(start_idx + 3, len(df) - 3):
-            # ✅ DÜZELTİLDİ: Swing High detection - daha gevşek kriterler (3 yerine 2 mum)
-            if (high.iloc[i] > high.iloc[i-1] and high.iloc[i] > high.iloc[i+1] and
-                high.iloc[i] > high.iloc[i-2] and high.iloc[i] > high.iloc[i+2]):
-                swing_highs.append((i, high.iloc[i]))
-                
-            # ✅ DÜZELTİLDİ: Swing Low detection - daha gevşek kriterler (3 yerine 2 mum)
-            if (low.iloc[i] < low.iloc[i-1] and low.iloc[i] < low.iloc[i+1] and
-                low.iloc[i] < low.iloc[i-2] and low.iloc[i] < low.iloc[i+2]):
-                swing_lows.append((i, low.iloc[i]))
+        lookback = min(config.SMC_STRUCTURE_LOOKBACK, n - 5)
+        start_idx = n - lookback
         
-        if len(swing_highs) < config.SMC_MIN_STRUCTURE_POINTS or len(swing_lows) < config.SMC_MIN_STRUCTURE_POINTS:
+        # ✅ DÜZELTİLDİ: Swing detection - daha gevşek kriterler (3 yerine 2 mum)
+        sh_idx, sh_price = _find_swings(high, 2, start_idx + 3, n - 3)
+        sl_idx, sl_price = _find_swings(low, 2, start_idx + 3, n - 3, lows=True)
+        
+        if len(sh_idx) < config.SMC_MIN_STRUCTURE_POINTS or len(sl_idx) < config.SMC_MIN_STRUCTURE_POINTS:
             return None
             
         return {
-            "swing_highs": swing_highs,
-            "swing_lows": swing_lows,
-            "current_price": close.iloc[-1]
+            "sh_idx": sh_idx,
+            "sh_price": sh_price,
+            "sl_idx": sl_idx,
+            "sl_price": sl_price,
+            "current_price": arrays["c_last"]
         }
     
-    def _detect_liquidity_hunt(self, df: pd.DataFrame, structure: Dict) -> Optional[Dict]:
+    def _detect_liquidity_hunt(self, arrays: Dict[str, np.ndarray], structure: Dict) -> Optional[Dict]:
         """
         Likidite avcılığı tespiti - Equal highs/lows ve sweep detection
         """
-        swing_highs = structure["swing_highs"]
-        swing_lows = structure["swing_lows"] 
-        current_price = structure["current_price"]
-        
-        high = df["h"]
-        low = df["l"]
-        close = df["c"]
+        BUF = config.SMC_LIQUIDITY_BUFFER
+        sh_idx, sh_price = structure["sh_idx"], structure["sh_price"]
+        sl_idx, sl_price = structure["sl_idx"], structure["sl_price"]
         
         # Equal highs detection (son 3 swing high)
-        if len(swing_highs) >= 3:
-            last_highs = swing_highs[-3:]
+        if len(sh_idx) >= 3:
+            last_highs = list(zip(sh_idx[-3:].tolist(), sh_price[-3:].tolist()))
             equal_highs = []
             
             for i in range(len(last_highs)):
                 for j in range(i + 1, len(last_highs)):
                     high1 = last_highs[i][1] 
                     high2 = last_highs[j][1]
-                    if abs(high1 - high2) / high1 <= config.SMC_LIQUIDITY_BUFFER:
+                    if abs(high1 - high2) / high1 <= BUF:
                         equal_highs.append((last_highs[i], last_highs[j]))
         
         # Equal lows detection (son 3 swing low)
-        if len(swing_lows) >= 3:
-            last_lows = swing_lows[-3:]
+        if len(sl_idx) >= 3:
+            last_lows = list(zip(sl_idx[-3:].tolist(), sl_price[-3:].tolist()))
             equal_lows = []
             
             for i in range(len(last_lows)):
                 for j in range(i + 1, len(last_lows)):
                     low1 = last_lows[i][1]
                     low2 = last_lows[j][1] 
-                    if abs(low1 - low2) / low1 <= config.SMC_LIQUIDITY_BUFFER:
+                    if abs(low1 - low2) / low1 <= BUF:
                         equal_lows.append((last_lows[i], last_lows[j]))
         
         # Liquidity sweep detection (son 5 mumda)
-        swept_highs = []
-        swept_lows = []
+        high = arrays["h"]
+        low = arrays["l"]
+        close = arrays["c"]
         
-        for i in range(len(df) - 5, len(df)):
-            if i < 0:
-                continue
-                
-            # High sweep check
-            for sh_idx, sh_price in swing_highs:
-                if (high.iloc[i] > sh_price * (1 + config.SMC_LIQUIDITY_BUFFER) and 
-                    close.iloc[i] < sh_price):  # Wick above, close below
-                    swept_highs.append((sh_idx, sh_price, i))
-                    
-            # Low sweep check
-            for sl_idx, sl_price in swing_lows:
-                if (low.iloc[i] < sl_price * (1 - config.SMC_LIQUIDITY_BUFFER) and
-                    close.iloc[i] > sl_price):  # Wick below, close above
-                    swept_lows.append((sl_idx, sl_price, i))
+        hi_idx, hi_price, hi_bar = detect_sweeps(high, close, sh_idx, sh_price, BUF, 5, True)
+        lo_idx, lo_price, lo_bar = detect_sweeps(low, close, sl_idx, sl_price, BUF, 5, False)
+        swept_highs = list(zip(hi_idx.tolist(), hi_price.tolist(), hi_bar.tolist()))
+        swept_lows = list(zip(lo_idx.tolist(), lo_price.tolist(), lo_bar.tolist()))
         
         if not swept_highs and not swept_lows:
             return None
@@ -261,74 +468,53 @@ class SMCv2Strategy(BaseStrategy):
             "equal_lows": equal_lows if 'equal_lows' in locals() else []
         }
     
-    def _detect_choch(self, df: pd.DataFrame, structure: Dict, liquidity_hunt: Dict) -> Optional[Dict]:
+    def _detect_choch(self, arrays: Dict[str, np.ndarray], structure: Dict, liquidity_hunt: Dict) -> Optional[Dict]:
         """
         Change of Character (CHOCH) detection
         """
-        swing_highs = structure["swing_highs"]
-        swing_lows = structure["swing_lows"]
         swept_highs = liquidity_hunt["swept_highs"]
         swept_lows = liquidity_hunt["swept_lows"]
         
-        close = df["c"]
-        current_price = close.iloc[-1]
+        current_price = float(arrays["c_last"])
         
-        choch_signals = []
+        _, swl_price, swl_bar = _swings_to_arrays(swept_lows)
+        _, swh_price, swh_bar = _swings_to_arrays(swept_highs)
         
-        # CHOCH for LONG (after low sweep)
-        for sl_idx, sl_price, sweep_idx in swept_lows:
-            # Find next swing high after sweep
-            next_high = None
-            for sh_idx, sh_price in swing_highs:
-                if sh_idx > sweep_idx:
-                    next_high = (sh_idx, sh_price)
-                    break
-            
-            if next_high:
-                # Check if current price broke above this high
-                if current_price > next_high[1] * (1 + config.BOS_EPS):
-                    choch_signals.append({
-                        "direction": "LONG",
-                        "sweep_low": sl_price,
-                        "sweep_idx": sweep_idx,
-                        "broken_high": next_high[1],
-                        "broken_idx": next_high[0]
-                    })
-        
-        # CHOCH for SHORT (after high sweep)  
-        for sh_idx, sh_price, sweep_idx in swept_highs:
-            # Find next swing low after sweep
-            next_low = None
-            for sl_idx, sl_price in swing_lows:
-                if sl_idx > sweep_idx:
-                    next_low = (sl_idx, sl_price)
-                    break
-                    
-            if next_low:
-                # Check if current price broke below this low
-                if current_price < next_low[1] * (1 - config.BOS_EPS):
-                    choch_signals.append({
-                        "direction": "SHORT", 
-                        "sweep_high": sh_price,
-                        "sweep_idx": sweep_idx,
-                        "broken_low": next_low[1],
-                        "broken_idx": next_low[0]
-                    })
-        
-        return choch_signals[-1] if choch_signals else None
+        direction, sweep_price, sweep_idx, broken_price, broken_idx = detect_choch_njit(
+            current_price, structure["sh_idx"], structure["sh_price"], structure["sl_idx"], structure["sl_price"],
+            swl_price, swl_bar, swh_price, swh_bar, config.BOS_EPS
+        )
+        
+        if direction == CHOCH_LONG:
+            return {
+                "direction": "LONG",
+                "sweep_low": float(sweep_price),
+                "sweep_idx": int(sweep_idx),
+                "broken_high": float(broken_price),
+                "broken_idx": int(broken_idx)
+            }
+        if direction == CHOCH_SHORT:
+            return {
+                "direction": "SHORT", 
+                "sweep_high": float(sweep_price),
+                "sweep_idx": int(sweep_idx),
+                "broken_low": float(broken_price),
+                "broken_idx": int(broken_idx)
+            }
+        return None
     
-    def _check_ote_retest(self, df: pd.DataFrame, choch: Dict, htf_bias: str) -> Optional[Dict]:
+    def _check_ote_retest(self, arrays: Dict[str, np.ndarray], choch: Dict, htf_bias: str) -> Optional[Dict]:
         """
         OTE (Optimal Trade Entry) retest confirmation
         """
         if not choch or choch["direction"] != htf_bias:
             return None
             
-        close = df["c"]
-        high = df["h"]
-        low = df["l"] 
-        volume = df["v"]
-        current_price = close.iloc[-1]
+        OTE_MIN = config.SMC_OTE_RETEST_MIN
+        OTE_MAX = config.SMC_OTE_RETEST_MAX
+        high = arrays["h"]
+        low = arrays["l"] 
+        current_price = arrays["c_last"]
         
         direction = choch["direction"]
         
@@ -337,38 +523,15 @@ class SMCv2Strategy(BaseStrategy):
             leg_low = choch["sweep_low"]
             leg_high = choch["broken_high"]
             
-            ote_min = leg_low + (leg_high - leg_low) * config.SMC_OTE_RETEST_MIN
-            ote_max = leg_low + (leg_high - leg_low) * config.SMC_OTE_RETEST_MAX
+            ote_min = leg_low + (leg_high - leg_low) * OTE_MIN
+            ote_max = leg_low + (leg_high - leg_low) * OTE_MAX
             
             # Check if price retested into OTE zone
             in_ote_zone = ote_min <= current_price <= ote_max
             
             # Check for recent retest (son 5 mumda)
-            retest_confirmed = False
-            confirmation_candle = None
-            
-            for i in range(len(df) - config.SMC_RETEST_CANDLES, len(df)):
-                if i < 0:
-                    continue
-                    
-                if ote_min <= low.iloc[i] <= ote_max:
-                    # Retest bulundu, confirmation mumu arıyoruz
-                    if i < len(df) - 1:  # Son mum değil
-                        next_candle = i + 1
-                        # ✅ DÜZELTİLDİ: Open column kontrolü iyileştirildi (LONG)
-                        if 'o' in df.columns:
-                            open_price = df['o'].iloc[next_candle]
-                        else:
-                            # Open yoksa previous close kullan
-                            open_price = close.iloc[next_candle-1] if next_candle > 0 else close.iloc[next_candle]
-                        body_strength = abs(close.iloc[next_candle] - open_price) / (high.iloc[next_candle] - low.iloc[next_candle] + 1e-10)
-                        
-                        if (close.iloc[next_candle] > open_price and  # Bullish candle
-                            body_strength >= config.SMC_CONFIRMATION_STRENGTH and  # Strong body
-                            volume.iloc[next_candle] > volume.iloc[i] * config.SMC_VOLUME_FACTOR):  # Volume confirmation
-                            retest_confirmed = True
-                            confirmation_candle = next_candle
-                            break
+            confirmation_candle = _find_retest_confirmation(arrays, low, ote_min, ote_max, 1)
+            retest_confirmed = confirmation_candle is not None
             
             if retest_confirmed:
                 return {
@@ -386,38 +549,15 @@ class SMCv2Strategy(BaseStrategy):
             leg_high = choch["sweep_high"] 
             leg_low = choch["broken_low"]
             
-            ote_min = leg_high - (leg_high - leg_low) * config.SMC_OTE_RETEST_MAX
-            ote_max = leg_high - (leg_high - leg_low) * config.SMC_OTE_RETEST_MIN
+            ote_min = leg_high - (leg_high - leg_low) * OTE_MAX
+            ote_max = leg_high - (leg_high - leg_low) * OTE_MIN
             
             # Check if price retested into OTE zone
             in_ote_zone = ote_min <= current_price <= ote_max
             
             # Check for recent retest (son 5 mumda)
-            retest_confirmed = False
-            confirmation_candle = None
-            
-            for i in range(len(df) - config.SMC_RETEST_CANDLES, len(df)):
-                if i < 0:
-                    continue
-                    
-                if ote_min <= high.iloc[i] <= ote_max:
-                    # Retest bulundu, confirmation mumu arıyoruz
-                    if i < len(df) - 1:  # Son mum değil
-                        next_candle = i + 1
-                        # ✅ DÜZELTİLDİ: Open column kontrolü iyileştirildi (SHORT)
-                        if 'o' in df.columns:
-                            open_price = df['o'].iloc[next_candle]
-                        else:
-                            # Open yoksa previous close kullan
-                            open_price = close.iloc[next_candle-1] if next_candle > 0 else close.iloc[next_candle]
-                        body_strength = abs(close.iloc[next_candle] - open_price) / (high.iloc[next_candle] - low.iloc[next_candle] + 1e-10)
-                        
-                        if (close.iloc[next_candle] < open_price and  # Bearish candle
-                            body_strength >= config.SMC_CONFIRMATION_STRENGTH and  # Strong body
-                            volume.iloc[next_candle] > volume.iloc[i] * config.SMC_VOLUME_FACTOR):  # Volume confirmation
-                            retest_confirmed = True
-                            confirmation_candle = next_candle
-                            break
+            confirmation_candle = _find_retest_confirmation(arrays, high, ote_min, ote_max, -1)
+            retest_confirmed = confirmation_candle is not None
             
             if retest_confirmed:
                 return {
@@ -432,20 +572,13 @@ class SMCv2Strategy(BaseStrategy):
         
         return None
     
-    def _create_smc_signal(self, df: pd.DataFrame, retest_signal: Dict, htf_bias: str) -> Optional[Dict[str, Any]]:
+    def _create_smc_signal(self, arrays: Dict[str, np.ndarray], retest_signal: Dict, htf_bias: str) -> Optional[Dict[str, Any]]:
         """
         SMC sinyali oluştur
         """
-        close = df["c"]
-        high = df["h"] 
-        low = df["l"]
-        
         direction = retest_signal["direction"]
         entry_price = retest_signal["entry_price"]
         
-        # ATR hesaplama
-        atr = float(atr_wilder(high, low, close, config.ATR_PERIOD).iloc[-1])
-        
         # SMC-based SL ve TP
         if direction == "LONG":
             sl = retest_signal["leg_low"] * (1 - config.SMC_LIQUIDITY_BUFFER)  # Sweep low altı
@@ -494,18 +627,25 @@ class SMCv2Strategy(BaseStrategy):
         )
 
 # Helper function to add open column if missing
-def add_open_column(df):
-    """Add open column if missing (for volume calculation)"""
-    if 'o' not in df.columns and len(df) > 0:
-        # Open = previous close, first candle open = first close
+def add_open_column(df, copy=True):
+    """Add open column if missing (for volume calculation). Pass copy=False if you own df."""
+    if 'o' in df.columns or len(df) == 0:
+        return df
+        
+    # Open = previous close, first candle open = first close
+    if copy:
         df = df.copy()
-        df['o'] = df['c'].shift(1)
-        df.loc[0, 'o'] = df.loc[0, 'c']  # First candle
-        df['o'] = df['o'].fillna(df['c'])
+    c = df['c'].to_numpy(dtype=np.float64)
+    o = np.empty_like(c)
+    o[0] = c[0]  # First candle
+    o[1:] = c[:-1]
+    # Önceki kapanış NaN ise mumun kendi kapanışı
+    np.copyto(o, c, where=np.isnan(o))
+    df['o'] = o
     return df
 
 # Apply to dataframes before using
 def preprocess_dataframe(df):
-    """Preprocess dataframe for SMC analysis"""
-    df = add_open_column(df)
+    """Preprocess dataframe for SMC analysis (df is modified in place; callers pass their own copy)"""
+    df = add_open_column(df, copy=False)
     return df
\ No newline at end of file
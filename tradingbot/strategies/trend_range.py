@@ -8,21 +8,42 @@ Range modu: BB bantları içinde sıçrama/dönüş
 """
 
 import pandas as pd
+import numpy as np
 import math
-from typing import Dict, Optional, Any, List
-
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from typing import Dict, Optional, Any, List, Tuple
 
 from .. import config
-from ..utils import sigmoid
-from .base import BaseStrategy
+from ..utils import sigmoid, bar_times
+from .base import BaseStrategy, TPS_R_ARRAY
+from ._kernels import (
+    trend_range_decision, trend_range_decision_batch, trend_range_retest, trend_range_momentum,
+    _ewm_last, _true_range, TR_SIDE_NONE, TR_REGIME_TREND
+)
 from ..indicators import (
-    atr_wilder, bollinger, donchian, adx, 
-    body_strength, rsi, ema, htf_gate_and_bias
+    bollinger, rsi, adx, body_strength_last, htf_gate_and_bias
 )
 
+# htf_gate_and_bias bias -> çekirdek kodu
+_BIAS_CODES = {"LONG": 1, "SHORT": -1}
+
+# (sembol, periyot) -> (ilk mum zamanı, son kapanmış mum zamanı, o mumun h/l/c'si,
+#                       kapanmış mum sayısı, o mumdaki ATR)
+_atr_state: Dict[tuple, tuple] = {}
+_INDICATOR_CACHE_MAX = 256
+# Bu kadar yeni kapanmış mumdan fazlası varsa tam hesaplamaya dön
+_ATR_MAX_STEPS = 4
+
+def _decision_params() -> Tuple:
+    """Karar çekirdeğinin config parametreleri (config çalışma anında değişebilir)."""
+    # ✅ DÜZELTİLDİ: Volume çarpanı belirsizliği düzeltildi
+    vol_mult = getattr(config, 'VOL_MULT_REQ_GLOBAL', 1.40)  # Config'den al, yoksa default
+    return (config.BREAK_BUFFER, config.ADX_TREND_MIN, config.BWIDTH_RANGE, config.RETEST_TOL_ATR,
+            config.ATR_STOP_MULT, vol_mult, TPS_R_ARRAY)
+
+def _indicator_params() -> Tuple:
+    """Gösterge periyotları ve range kapısı (ATR_PERIOD, BB_PERIOD, BB_K, DONCHIAN_WIN, BWIDTH_RANGE)."""
+    return (config.ATR_PERIOD, config.BB_PERIOD, config.BB_K, config.DONCHIAN_WIN, config.BWIDTH_RANGE)
+
 class TrendRangeStrategy(BaseStrategy):
     """
     Trend/Range stratejisi.
@@ -44,207 +65,247 @@ class TrendRangeStrategy(BaseStrategy):
         Returns:
             Dict veya None: Sinyal veya sinyal yoksa None
         """
-        o, c, h, l, v = df15["o"], df15["c"], df15["h"], df15["l"], df15["v"]
-        atr_val = atr_wilder(h, l, c, config.ATR_PERIOD)
-        ma, bb_u, bb_l, bwidth, _ = bollinger(c, config.BB_PERIOD, config.BB_K)
-        dc_hi, dc_lo = donchian(h, l, config.DONCHIAN_WIN)
-        bs = body_strength(o, c, h, l)
-        
-        close = float(c.iloc[-1])
-        prev_close = float(c.iloc[-2])
-        atrv = float(atr_val.iloc[-1])
-        bw = float(bwidth.iloc[-1])
-        dchi = float(dc_hi.shift(1).iloc[-1])
-        dclo = float(dc_lo.shift(1).iloc[-1])
+        prep = self._decision_inputs(df15, df1h, _indicator_params())
+        if prep is None:
+            return None
+            
+        c_a, x = prep
+        result = trend_range_decision(c_a, *x, *_decision_params())
+        return self._build_signal(x, result)
+    
+    @classmethod
+    def analyze_batch(cls, payloads: List[Tuple[str, pd.DataFrame, pd.DataFrame]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Birden fazla sembolü analiz et. Gösterge skalerleri sembol başına çıkarılır,
+        karar mantığı tek bir paralel çekirdek çağrısında tüm semboller için çalışır.
         
-        bias, disp_ok, adx1h, trend_ok = htf_gate_and_bias(df1h)
-        candidates = []
+        Args:
+            payloads: (sembol, df15, df1h) listesi
+            
+        Returns:
+            Dict: sembol -> sinyal (veya None)
+        """
+        # config tüm parti için bir kez okunur
+        ind_params = _indicator_params()
+        dec_params = _decision_params()
         
-        # --- TREND BREAK + (RETEST or MOMENTUM) ---
-        if trend_ok and disp_ok:
-            if bias == "LONG":
-                long_break = (prev_close > dchi * (1 + config.BREAK_BUFFER)) and (close >= prev_close)
+        results = {}
+        live, closes, rows = [], [], []
+        for symbol, df15, df1h in payloads:
+            results[symbol] = None
+            strategy = cls(symbol)
+            prep = strategy._decision_inputs(df15, df1h, ind_params)
+            if prep is not None:
+                live.append(strategy)
+                closes.append(prep[0])
+                rows.append(prep[1])
                 
-                if long_break and (self.retest_ok_long(dchi, df15, atrv) or self.momentum_ok(df15, "LONG")):
-                    sl, tps = self.compute_sl_tp("LONG", close, atrv)
-                    rr1 = (tps[0] - close) / max(1e-9, close - sl)
-                    
-                    score = 40 + min(20, (adx1h - config.ADX_TREND_MIN) * 1.2) + (bs.iloc[-1] * 10)
-                    if rr1 < 1.0:
-                        score -= 4
-                        
-                    reason = f"Trend kırılımı + {'Retest' if self.retest_ok_long(dchi, df15, atrv) else 'Momentum'} | 1H ADX={adx1h:.1f}, BW={bw:.4f}"
-                    
-                    signal = self.create_signal_dict(
-                        side="LONG",
-                        entry=close,
-                        sl=sl,
-                        tps=tps,
-                        score=score,
-                        reason=reason
-                    )
-                    signal["regime"] = "TREND"
-                    candidates.append(signal)
-                    
-            elif bias == "SHORT":
-                short_break = (prev_close < dclo * (1 - config.BREAK_BUFFER)) and (close <= prev_close)
-                
-                if short_break and (self.retest_ok_short(dclo, df15, atrv) or self.momentum_ok(df15, "SHORT")):
-                    sl, tps = self.compute_sl_tp("SHORT", close, atrv)
-                    rr1 = (close - tps[0]) / max(1e-9, sl - close)
-                    
-                    score = 40 + min(20, (adx1h - config.ADX_TREND_MIN) * 1.2) + (bs.iloc[-1] * 10)
-                    if rr1 < 1.0:
-                        score -= 4
-                        
-                    reason = f"Trend kırılımı + {'Retest' if self.retest_ok_short(dclo, df15, atrv) else 'Momentum'} | 1H ADX={adx1h:.1f}, BW={bw:.4f}"
-                    
-                    signal = self.create_signal_dict(
-                        side="SHORT",
-                        entry=close,
-                        sl=sl,
-                        tps=tps,
-                        score=score,
-                        reason=reason
-                    )
-                    signal["regime"] = "TREND"
-                    candidates.append(signal)
-        
-        # --- RANGE MEAN-REVERT (SMART BOUNCE) ---
-        if (not trend_ok) and (not math.isnan(bw)) and bw <= config.BWIDTH_RANGE:
-            rsi14 = float(rsi(c, 14).iloc[-1])
-            ma_v, bbu_v, bbl_v = float(ma.iloc[-1]), float(bb_u.iloc[-1]), float(bb_l.iloc[-1])
+        if not live:
+            return results
             
-            near_lower = close <= bbl_v * (1 + 0.0010)
-            near_upper = close >= bbu_v * (1 - 0.0010)
-            
-            re_enter_long = (float(c.iloc[-2]) < bbl_v) and (float(c.iloc[-1]) > bbl_v)
-            re_enter_short = (float(c.iloc[-2]) > bbu_v) and (float(c.iloc[-1]) < bbu_v)
+        c_off = np.zeros(len(closes) + 1, dtype=np.int64)
+        np.cumsum([len(c_a) for c_a in closes], out=c_off[1:])
+        X = np.array(rows, dtype=np.float64)
+        sides, regimes, scores, sls, tps, retests = trend_range_decision_batch(
+            np.concatenate(closes), c_off, X, *dec_params
+        )
+        
+        # Sinyaller "p" olmadan oluşturulur, olasılıklar tek vektörel geçişte doldurulur
+        signals = []
+        for i in np.flatnonzero(sides != TR_SIDE_NONE):
+            result = (sides[i], regimes[i], scores[i], sls[i], tps[i, 0], tps[i, 1], tps[i, 2], retests[i])
+            signal = live[i]._build_signal(rows[i], result, defer_p=True)
+            results[live[i].symbol] = signal
+            signals.append(signal)
+        cls.finalize_batch(signals)
+        return results
+    
+    def _decision_inputs(self, df15: pd.DataFrame, df1h: pd.DataFrame,
+                         params: Tuple) -> Optional[Tuple[np.ndarray, Tuple]]:
+        """
+        Karar çekirdeğinin sembole bağlı girdilerini hesapla. Göstergeler sadece
+        kapıları açık olan dal için hesaplanır.
+        
+        Args:
+            df15: Düşük zaman dilimi DataFrame'i (15 dakika)
+            df1h: Yüksek zaman dilimi DataFrame'i (1 saat)
+            params: _indicator_params() çıktısı
             
-            bs_last = float(body_strength(o, c, h, l).iloc[-1])
+        Returns:
+            Tuple veya None: (15M kapanış dizisi, TR_BATCH_FIELDS sırasında skalerler)
+            veya hiçbir dal sinyal üretemiyorsa None
+        """
+        ATR_PERIOD, BB_PERIOD, BB_K, DONCHIAN_WIN, BWIDTH_RANGE = params
+        
+        # Önce HTF kapısı: hangi dalın sinyal üretebileceğini belirler
+        bias, disp_ok, adx1h, trend_ok = htf_gate_and_bias(df1h)
+        bias_code = _BIAS_CODES.get(bias, 0)
+        trend_live = bool(trend_ok and disp_ok and bias_code != 0)
+        if trend_ok and not trend_live:
+            return None
             
-            # ✅ DÜZELTİLDİ: Volume çarpanı belirsizliği düzeltildi
-            vol_mult = getattr(config, 'VOL_MULT_REQ_GLOBAL', 1.40)  # Config'den al, yoksa default
-            vol_ok = float(v.iloc[-1]) > float(v.rolling(20).mean().iloc[-1]) * vol_mult
-            RSI_LONG_TH = 36
-            RSI_SHORT_TH = 64
-            bs_last_req = 0.62
+        o, c, h, l = df15["o"], df15["c"], df15["h"], df15["l"]
+        o_a, c_a = o.to_numpy(), c.to_numpy(dtype=np.float64)
+        h_a, l_a = h.to_numpy(dtype=np.float64), l.to_numpy(dtype=np.float64)
+        close = float(c_a[-1])
+        prev_close = float(c_a[-2])
+        atrv = self._cached_atr_last(df15, h_a, l_a, c_a, ATR_PERIOD)
+        if atrv / (close + 1e-12) > 0.035:
+            return None
             
-            if (near_lower and rsi14 < RSI_LONG_TH and re_enter_long and 
-                bs_last >= bs_last_req and vol_ok and bias != "SHORT"):
-                
-                sl, tps = self.compute_sl_tp("LONG", close, atrv)
-                score = 30 + (max(0, 38 - rsi14)) + (1 - bw / max(1e-12, config.BWIDTH_RANGE)) * 10
-                
-                reason = f"Bant içi bounce (false breakout→re-enter + güçlü mum + hacim) | RSI={rsi14:.1f}, BW={bw:.4f}"
-                
-                signal = self.create_signal_dict(
-                    side="LONG",
-                    entry=close,
-                    sl=sl,
-                    tps=tps,
-                    score=score,
-                    reason=reason
-                )
-                signal["regime"] = "RANGE"
-                candidates.append(signal)
-                
-            if (near_upper and rsi14 > RSI_SHORT_TH and re_enter_short and 
-                bs_last >= bs_last_req and vol_ok and bias != "LONG"):
-                
-                sl, tps = self.compute_sl_tp("SHORT", close, atrv)
-                score = 30 + (max(0, rsi14 - 62)) + (1 - bw / max(1e-12, config.BWIDTH_RANGE)) * 10
-                
-                reason = f"Bant içi bounce (false breakout→re-enter + güçlü mum + hacim) | RSI={rsi14:.1f}, BW={bw:.4f}"
-                
-                signal = self.create_signal_dict(
-                    side="SHORT",
-                    entry=close,
-                    sl=sl,
-                    tps=tps,
-                    score=score,
-                    reason=reason
-                )
-                signal["regime"] = "RANGE"
-                candidates.append(signal)
+        ma, bb_u, bb_l, bwidth, _ = bollinger(c, BB_PERIOD, BB_K)
+        bw = float(bwidth.to_numpy()[-1])
+        bs_last = body_strength_last(o_a, c_a, h_a, l_a)
+        
+        dchi = dclo = math.nan
+        rsi14 = bbu_v = bbl_v = vol_last = vol_mean20 = math.nan
+        if trend_live:
+            # donchian(...).shift(1).iloc[-1]: son mum hariç son DONCHIAN_WIN mumun max/min'i
+            # (max/min kesin olduğu için tam seri hesabıyla birebir aynı)
+            if len(h_a) > DONCHIAN_WIN:
+                dchi = float(h_a[-DONCHIAN_WIN - 1:-1].max())
+                dclo = float(l_a[-DONCHIAN_WIN - 1:-1].min())
+        else:
+            # Range modu: bant dar değilse sinyal çıkamaz
+            if math.isnan(bw) or bw > BWIDTH_RANGE:
+                return None
+            rsi14 = float(rsi(c, 14).to_numpy()[-1])
+            bbu_v, bbl_v = float(bb_u.to_numpy()[-1]), float(bb_l.to_numpy()[-1])
+            v_a = df15["v"].to_numpy(dtype=np.float64)
+            vol_last = float(v_a[-1])
+            if len(v_a) >= 20:
+                vol_mean20 = float(v_a[-20:].mean())
                 
-        if not candidates:
-            return None
+        return c_a, (
+            close, prev_close, float(o_a[-1]), float(h_a[-1]), float(l_a[-1]), atrv, bw,
+            dchi, dclo, bias_code, bool(trend_ok), bool(disp_ok), float(adx1h), bs_last,
+            rsi14, bbu_v, bbl_v, vol_last, vol_mean20
+        )
+    
+    def _cached_atr_last(self, df: pd.DataFrame, h: np.ndarray, l: np.ndarray,
+                         c: np.ndarray, n: int) -> float:
+        """
+        Wilder ATR(n) son değerini artımlı hesapla.
+        Kapanmış mumdaki ATR durumu (sembol, periyot) bazında saklanır; seri yeni mumlarla
+        büyüdüğünde veya sadece canlı mum değiştiğinde yalnız yeni TR değerleriyle güncellenir.
+        Son kapanmış mum (zaman ve h/l/c) eşleşmezse tam hesaplama _true_range/_ewm_last
+        çekirdekleriyle yapılır (atr_wilder ile birebir aynı).
+        """
+        ts = bar_times(df)
+        n_closed = len(c) - 1
+        alpha = 1 / n
+        
+        key = (self.symbol, n)
+        state = _atr_state.get(key)
+        if state is not None:
+            first_ts, prev_ts, prev_bar, prev_closed, atr_prev = state
+            if (prev_closed <= n_closed < prev_closed + _ATR_MAX_STEPS
+                    and ts[0] == first_ts and ts[prev_closed - 1] == prev_ts
+                    and (h[prev_closed - 1], l[prev_closed - 1], c[prev_closed - 1]) == prev_bar):
+                # Yeni TR değerleri (ilk eleman önceki kapanış için NaN, atlanır)
+                tr = _true_range(h[prev_closed - 1:], l[prev_closed - 1:], c[prev_closed - 1:])[1:]
+                if not np.isnan(tr).any():
+                    # ATR'ler pandas ewm(adjust=False) adımıyla zincirlenir
+                    steps = np.concatenate(([atr_prev], tr))
+                    if len(tr) > 1:
+                        atr_closed = float(_ewm_last(steps[:-1], alpha))
+                        _atr_state[key] = (first_ts, ts[-2], (h[-2], l[-2], c[-2]), n_closed, atr_closed)
+                    return float(_ewm_last(steps, alpha))
+                    
+        # Tam hesaplama: atr_wilder(...).iloc[-1] ile birebir aynı
+        tr = _true_range(h, l, c)
+        if np.isnan(tr[-2]) or np.isnan(c[-2]):
+            # NaN boşluğu sonraki adımın ağırlığını değiştirir; durum saklanmaz
+            return float(_ewm_last(tr, alpha))
             
-        # Ortak ATR% filtresi: aşırı oynak günleri ele
-        atrv_last = float(atr_wilder(df15["h"], df15["l"], df15["c"], config.ATR_PERIOD).iloc[-1])
-        close_last = float(df15["c"].iloc[-1])
-        atr_pct = atrv_last / (close_last + 1e-12)
+        atr_closed = float(_ewm_last(tr[:-1], alpha))
+        if key not in _atr_state and len(_atr_state) >= _INDICATOR_CACHE_MAX:
+            _atr_state.pop(next(iter(_atr_state)))
+        _atr_state[key] = (ts[0], ts[-2], (h[-2], l[-2], c[-2]), n_closed, atr_closed)
+        # Kapanmış mumdan canlı muma tek adım (canlı TR NaN ise değer değişmez)
+        return float(_ewm_last(np.array([atr_closed, tr[-1]]), alpha))
+    
+    def _build_signal(self, x: Tuple, result: Tuple, defer_p: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Karar çekirdeği çıktısından sinyal sözlüğünü oluştur.
         
-        if atr_pct > 0.035:
+        Args:
+            x: _decision_inputs skalerleri
+            result: (yön, rejim, skor, sl, tp1, tp2, tp3, retest)
+            defer_p: True ise "p" finalize_batch ile sonradan doldurulur
+            
+        Returns:
+            Dict veya None: Sinyal veya aday yoksa None
+        """
+        side, regime, score, sl, tp1, tp2, tp3, retest = result
+        if side == TR_SIDE_NONE:
             return None
             
-        return sorted(candidates, key=lambda x: x["score"], reverse=True)[0]
+        close, bw, adx1h, rsi14 = x[0], x[6], x[12], x[14]
+        # Kazanan aday tek bir kez sözlüğe dönüştürülür
+        if regime == TR_REGIME_TREND:
+            reason = f"Trend kırılımı + {'Retest' if retest else 'Momentum'} | 1H ADX={adx1h:.1f}, BW={bw:.4f}"
+        else:
+            reason = f"Bant içi bounce (false breakout→re-enter + güçlü mum + hacim) | RSI={rsi14:.1f}, BW={bw:.4f}"
+            
+        signal = self.create_signal_dict(
+            side="LONG" if side > 0 else "SHORT",
+            entry=close,
+            sl=float(sl),
+            tps=(float(tp1), float(tp2), float(tp3)),
+            score=float(score),
+            reason=reason,
+            defer_p=defer_p
+        )
+        signal["regime"] = "TREND" if regime == TR_REGIME_TREND else "RANGE"
+        return signal
     
-    def retest_ok_long(self, dc_break_level: float, df15: pd.DataFrame, atrv: float) -> bool:
+    @staticmethod
+    def retest_ok_long(dc_break_level: float, low: float, close: float, open_: float,
+                       high: float, atrv: float) -> bool:
         """
         Long için retest kontrolü.
         
         Args:
             dc_break_level: Donchian kırılım seviyesi
-            df15: Düşük zaman dilimi DataFrame'i (15 dakika)
+            low, close, open_, high: Son 15M mumun değerleri
             atrv: ATR değeri
             
         Returns:
             bool: Retest onayı varsa True
         """
-        low = float(df15["l"].iloc[-1])
-        close = float(df15["c"].iloc[-1])
-        open_ = float(df15["o"].iloc[-1])
-        
-        tol = config.RETEST_TOL_ATR * atrv
-        touched = (low <= dc_break_level + tol)
-        
-        body_ratio = (close - open_) / max(1e-12, df15["h"].iloc[-1] - df15["l"].iloc[-1])
-        strong = (close > open_) and (body_ratio > 0.55)
-        
-        return touched and strong
+        return bool(trend_range_retest(1, dc_break_level, open_, high, low, close, atrv, config.RETEST_TOL_ATR))
     
-    def retest_ok_short(self, dc_break_level: float, df15: pd.DataFrame, atrv: float) -> bool:
+    @staticmethod
+    def retest_ok_short(dc_break_level: float, low: float, close: float, open_: float,
+                        high: float, atrv: float) -> bool:
         """
         Short için retest kontrolü.
         
         Args:
             dc_break_level: Donchian kırılım seviyesi
-            df_ltf: Düşük zaman dilimi DataFrame'i (15 dakika)
+            low, close, open_, high: Son 15M mumun değerleri
             atrv: ATR değeri
             
         Returns:
             bool: Retest onayı varsa True
         """
-        high = float(df15["h"].iloc[-1])
-        close = float(df15["c"].iloc[-1])
-        open_ = float(df15["o"].iloc[-1])
-        
-        tol = config.RETEST_TOL_ATR * atrv
-        touched = (high >= dc_break_level - tol)
-        
-        body_ratio = (open_ - close) / max(1e-12, df15["h"].iloc[-1] - df15["l"].iloc[-1])
-        strong = (close < open_) and (body_ratio > 0.55)
-        
-        return touched and strong
+        return bool(trend_range_retest(-1, dc_break_level, open_, high, low, close, atrv, config.RETEST_TOL_ATR))
     
-    def momentum_ok(self, df15: pd.DataFrame, side: str) -> bool:
+    @staticmethod
+    def momentum_ok(ema9_last: float, ema21_last: float, close: float, prev_close: float,
+                    bs_last: float, side: str) -> bool:
         """
         Momentum onayı kontrolü.
         
         Args:
-            df_ltf: Düşük zaman dilimi DataFrame'i (15 dakika)
+            ema9_last, ema21_last: 15M kapanış EMA9/EMA21 son değerleri
+            close, prev_close: Son iki 15M kapanış
+            bs_last: Son mumun gövde gücü (body_strength_last)
             side: İşlem yönü ("LONG" veya "SHORT")
             
         Returns:
             bool: Momentum onayı varsa True
         """
-        c, o = df15["c"], df15["o"]
-        e9, e21 = ema(c, 9), ema(c, 21)
-        bs = body_strength(o, c, df15["h"], df15["l"]).iloc[-1]
-        
-        if side == "LONG":
-            return (e9.iloc[-1] > e21.iloc[-1]) and (float(c.iloc[-1]) >= float(c.iloc[-2])) and (bs >= 0.60)
-        else:
-            return (e9.iloc[-1] < e21.iloc[-1]) and (float(c.iloc[-1]) <= float(c.iloc[-2])) and (bs >= 0.60)
\ No newline at end of file
+        return bool(trend_range_momentum(ema9_last, ema21_last, close, prev_close, bs_last,
+                                         1 if side == "LONG" else -1))
@@ -13,6 +13,7 @@ import numpy as np
 from typing import List, Dict, Tuple, Optional, Set, Union, Any
 
 from . import config
+from ._njit import njit, HAS_NUMBA
 
 def log(*args):
     """Log mesajı yazdır ve hemen flush yap."""
@@ -28,35 +29,122 @@ def fmt(x: float) -> str:
     return f"{x:.6f}"
 
 def sigmoid(x: float) -> float:
-    """Sigmoid fonksiyonu (0-1 arası normalize edilmiş değer döndürür)."""
-    return 1/(1+math.exp(-x))
+    """
+    Sigmoid fonksiyonu (0-1 arası normalize edilmiş değer döndürür).
+    exp argümanı her zaman <= 0 tutulur: büyük negatif x'te math.exp taşmaz
+    (OverflowError yerine 0'a yaklaşır), küçük olasılıklar da hassas kalır.
+    """
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
 
 def clip_value(value: float, lower: float, upper: float) -> float:
     """Değeri belirli bir aralıkta kırp (clip)."""
     return max(lower, min(upper, value))
 
+# Skaler sigmoid/clip_value saf Python kalır: tek değer için njit çağrı maliyeti
+# math.exp'ten pahalı, clip_value ise int girdilerde int döndürmeye devam etmeli.
+@njit(cache=True)
+def _sigmoid_arr_njit(x):
+    out = np.empty_like(x)
+    for i in range(x.shape[0]):
+        v = x[i]
+        if v >= 0:
+            out[i] = 1.0 / (1.0 + np.exp(-v))
+        else:
+            z = np.exp(v)
+            out[i] = z / (1.0 + z)
+    return out
+
+@njit(cache=True)
+def _clip_arr_njit(x, lower, upper):
+    out = np.empty_like(x)
+    for i in range(x.shape[0]):
+        v = x[i]
+        v = upper if v > upper else v
+        out[i] = lower if v < lower else v
+    return out
+
+def sigmoid_arr(x) -> np.ndarray:
+    """
+    Sigmoid fonksiyonunun vektörel hali (toplu skorlama için).
+    
+    Args:
+        x: Skor dizisi
+        
+    Returns:
+        np.ndarray: 0-1 arası değerler (float64)
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64).ravel()
+    if HAS_NUMBA:
+        return _sigmoid_arr_njit(x)
+    # sigmoid ile aynı kararlı form: exp(-|x|)
+    z = np.exp(-np.abs(x))
+    return np.where(x >= 0, 1.0 / (1.0 + z), z / (1.0 + z))
+
+def clip_arr(x, lower: float, upper: float) -> np.ndarray:
+    """
+    clip_value fonksiyonunun vektörel hali.
+    
+    Args:
+        x: Değer dizisi
+        lower: Alt sınır
+        upper: Üst sınır
+        
+    Returns:
+        np.ndarray: Kırpılmış değerler (float64)
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64).ravel()
+    if HAS_NUMBA:
+        return _clip_arr_njit(x, float(lower), float(upper))
+    return np.minimum(np.maximum(x, lower), upper)
+
+# Ham mum satırı kolon düzenleri
+KLINE_COLS_CCXT = ("time", "o", "h", "l", "c", "v")
+KLINE_COLS_KUCOIN = ("time", "o", "c", "h", "l", "v", "turnover")
+
 def to_df_klines(raw):
     """
-    CCXT OHLCV verilerini pandas DataFrame'e dönüştür.
+    Ham OHLCV verilerini pandas DataFrame'e dönüştür.
+    
+    Satır uzunluğuna göre düzen seçilir: 6 kolon CCXT
+    (timestamp[ms], open, high, low, close, volume), 7 kolon KuCoin REST
+    (time[s], open, close, high, low, volume, turnover).
     
     Args:
-        raw: CCXT API'sinden dönen OHLCV verileri (timestamp, open, high, low, close, volume formatında)
+        raw: CCXT veya KuCoin API'sinden dönen OHLCV satırları
         
     Returns:
-        pd.DataFrame veya None: Dönüştürülmüş DataFrame veya veri yoksa None
+        pd.DataFrame veya None: time, o, h, l, c, v kolonlu DataFrame veya veri yoksa None
     """
-    # CCXT: [timestamp, open, high, low, close, volume]
     if not raw: 
         return None
     
-    df = pd.DataFrame(raw, columns=["time", "o", "h", "l", "c", "v"])
-    for col in ["time", "o", "h", "l", "c", "v"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    if len(raw[0]) == len(KLINE_COLS_KUCOIN):
+        cols, time_unit = KLINE_COLS_KUCOIN, "s"
+    else:
+        cols, time_unit = KLINE_COLS_CCXT, "ms"
     
-    df.dropna(inplace=True)
-    df["time"] = pd.to_datetime(df["time"].astype(np.int64), unit="ms", utc=True)
-    df.sort_values("time", inplace=True)
-    df.reset_index(drop=True, inplace=True)
+    try:
+        # Tüm hücreler tek seferde float64'e çevrilir (None -> NaN)
+        arr = np.asarray(raw, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Sayıya çevrilemeyen hücre var: kolon bazlı coerce yoluna düş
+        df = pd.DataFrame(raw, columns=list(cols))
+        arr = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    
+    bad = np.isnan(arr).any(axis=1)
+    if bad.any():
+        arr = arr[~bad]
+    
+    df = pd.DataFrame({"time": pd.to_datetime(arr[:, 0].astype(np.int64), unit=time_unit, utc=True)})
+    for k in KLINE_COLS_CCXT[1:]:
+        df[k] = arr[:, cols.index(k)]
+    # KuCoin REST en yeni mumu önce döndürür
+    if not df["time"].is_monotonic_increasing:
+        df.sort_values("time", inplace=True)
+        df.reset_index(drop=True, inplace=True)
     
     return df
 
@@ -67,4 +155,14 @@ def chunked(seq, n):
 
 def series_like(x, idx):
     """Eğer x bir Series değilse, verilen index ile Series'e dönüştür."""
-    return x if isinstance(x, pd.Series) else pd.Series(x, index=idx)
\ No newline at end of file
+    return x if isinstance(x, pd.Series) else pd.Series(x, index=idx)
+
+
+def bar_times(df) -> np.ndarray:
+    """
+    Mum zamanları ("time" kolonu yoksa index) ucuz bir numpy görünümü olarak.
+    tz-aware datetime kolonları Timestamp nesne dizisine çevrilmez, int64 (ns) görünümü döner.
+    """
+    col = df["time"] if "time" in df.columns else df.index
+    asi8 = getattr(col.array, "asi8", None)
+    return asi8 if asi8 is not None else np.asarray(col)